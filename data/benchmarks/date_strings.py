@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Benchmark of find_date_string on a mix of the timestamp formats the pipeline parses.
+#
+# Timestamps are parsed three times: once with datefinder alone, as find_date_string did before, once with
+# parse_date_string_fast and the datefinder fallback without any cache, once with the cached find_date_string
+# used now. The results of the three parsers are checked to be equal on the timestamps given to datefinder.
+#
+# Usage: python data/benchmarks/date_strings.py [timestamps] [timestamps_baseline]
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import time as time_mod
+
+import datefinder
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from data.shared import find_date_string, parse_date_string, parse_date_string_fast
+
+JAVASCRIPT_ZONES = [('+0000', 'Coordinated Universal Time'), ('+0100', 'Central European Standard Time'), ('+0200', 'Central European Summer Time'), ('-0500', 'Eastern Standard Time'), ('+0530', 'India Standard Time')]
+
+
+def build_timestamps(timestamps, seed=0):
+    # 40% strftime('%c'), 30% epoch milliseconds, 20% Date.toString() and 10% str(datetime), mostly unique
+    generator = random.Random(seed)
+    dates = []
+    for _ in range(timestamps):
+        date = datetime(2020, 1, 1) + timedelta(seconds=generator.randint(0, 5 * 365 * 86400))
+        kind = generator.random()
+        if kind < 0.4:
+            dates.append(date.strftime('%c'))
+        elif kind < 0.7:
+            dates.append(int(date.timestamp() * 1000) + generator.randint(0, 999))
+        elif kind < 0.9:
+            offset, zone = generator.choice(JAVASCRIPT_ZONES)
+            dates.append(f"{date.strftime('%a %b %d %Y %H:%M:%S')} GMT{offset} ({zone})")
+        else:
+            dates.append(str(date))
+    return dates
+
+
+def date_raw_for(date, seconds=False):
+    if type(date) is int or type(date) is float or type(date) is np.float64 or type(date) is np.float32:
+        return str(datetime.fromtimestamp(date if seconds else date // 1000))
+    return date
+
+
+def find_date_string_datefinder(date, seconds=False):
+    # find_date_string as it was before the fast path and the cache
+    for date_current in datefinder.find_dates(date_raw_for(date, seconds), strict=True):
+        return ' '.join(str(date_current).split('+'))
+    return None
+
+
+def find_date_string_uncached(date, seconds=False):
+    date_raw = date_raw_for(date, seconds)
+    date_current = parse_date_string_fast(date_raw)
+    if date_current is None:
+        date_current = find_date_string_datefinder(date_raw)
+    return ' '.join(date_current.split('+')) if date_current is not None else None
+
+
+def measure(parser, dates):
+    start = time_mod()
+    results = [parser(date) for date in dates]
+    return results, time_mod() - start
+
+
+if __name__ == '__main__':
+
+    timestamps = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    timestamps_baseline = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    for timestamps_current, baseline in [(timestamps_baseline, True), (timestamps, False)]:
+        dates = build_timestamps(timestamps_current)
+        parsers = [('datefinder', find_date_string_datefinder)] if baseline else []
+        parsers += [('fast path', find_date_string_uncached), ('cached find_date_string', find_date_string)]
+        results_all = []
+        for parser_name, parser in parsers:
+            parse_date_string.cache_clear()
+            results, elapsed = measure(parser, dates)
+            results_all.append(results)
+            print(f"{timestamps_current} timestamps, {parser_name}: {elapsed:.2f}s ({timestamps_current / elapsed:.0f} timestamps/s)")
+        for results in results_all[1:]:
+            assert results == results_all[0], "The parsers returned different dates"
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Benchmark of the workers_logs partial built for one synthetic worker.
+#
+# The flatteners are loaded from download.py, which cannot be imported since it runs the whole pipeline.
+# The partial is built twice: once by the loop used before, copied below, which appends each row with
+# `df.loc[len(df)] = row`, registers each column with `df[column] = np.nan` and parses each timestamp on its own,
+# once by the row buffer and the vectorized date parsing used now. Both partials are written to CSV, as the
+# pipeline does, and the frames read back are checked to be equal.
+#
+# Usage: python data/benchmarks/log_rows.py [events] [events_baseline]
+
+import ast
+import io
+import random
+import re
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from time import time as time_mod
+
+import numpy as np
+import pandas as pd
+from pytz import timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from data.shared import find_date_series, find_date_string
+
+DOWNLOAD_PATH = Path(__file__).resolve().parents[1] / 'download.py'
+FUNCTIONS_LOADED = ['add_log_column', 'append_log_row', 'log_attribute_name']
+
+
+def load_log_flatteners():
+    module = ast.parse(DOWNLOAD_PATH.read_text(encoding='utf-8'))
+    nodes = []
+    for node in module.body:
+        if isinstance(node, ast.FunctionDef) and (node.name in FUNCTIONS_LOADED or node.name.startswith('flatten_log_')):
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(isinstance(target, ast.Name) and target.id == 'log_flatteners' for target in node.targets):
+            nodes.append(node)
+    namespace = {'np': np, 're': re, 'lru_cache': lru_cache}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(DOWNLOAD_PATH), 'exec'), namespace)
+    return namespace
+
+
+def build_synthetic_logs(events, seed=0):
+    generator = random.Random(seed)
+    logs = []
+    for sequence in range(events):
+        time_client = 1654000000000 + sequence * 250
+        kind = generator.choices(['movements', 'keySequence', 'click', 'scroll', 'query', 'selection'], weights=[40, 25, 10, 15, 5, 5])[0]
+        if kind == 'movements':
+            details = {'section': 'document', 'points': [
+                {'timeStamp': time_client + point, 'position': {'x': generator.randint(0, 1920), 'y': generator.randint(0, 1080)}}
+                for point in range(generator.randint(1, 6))
+            ]}
+        elif kind == 'keySequence':
+            details = {'section': 'search', 'sentence': 'lorem ipsum', 'keySequence': [
+                {'timeStamp': time_client + key, 'key': generator.choice('abcdefgh ')}
+                for key in range(generator.randint(1, 4))
+            ]}
+        elif kind == 'click':
+            details = {'section': 'document', 'mouseButton': 'left', 'target': {'tagName': 'BUTTON', 'id': f"button-{generator.randint(0, 9)}"}}
+        elif kind == 'scroll':
+            details = {'section': 'document', 'startTimeStamp': time_client, 'endTimeStamp': time_client + 120}
+        elif kind == 'query':
+            details = {'section': 'search', 'query': {'text': 'lorem ipsum', 'encoded': 'lorem%20ipsum'}}
+        else:
+            details = {'section': 'document', 'selected': 'lorem'}
+        logs.append({
+            'task': 'Benchmark',
+            'batch': 'Batch1',
+            'unit_id': 'unit_0',
+            'sequence': str(sequence),
+            'type': kind,
+            'time_server': time_client + 40,
+            'time_client': time_client,
+            'details': details
+        })
+    return logs
+
+
+def accumulate_buffer(flatteners, logs, column_names):
+    log_columns = dict.fromkeys(column_names)
+    log_rows = []
+    for data_log in logs:
+        row = {
+            'worker_id': 'WORKER',
+            'paid': True,
+            'task_name': data_log['task'],
+            'batch_name': data_log['batch'],
+            'unit_id': data_log['unit_id'],
+            'task_started': True,
+            'sequence': data_log['sequence'],
+            'time_server': data_log['time_server'],
+            'time_client': data_log['time_client'],
+            'type': data_log['type'],
+        }
+        log_details = data_log['details']
+        if log_details:
+            flatteners['log_flatteners'][data_log['type']](row, log_details, log_columns, log_rows)
+        flatteners['append_log_row'](log_rows, log_columns, row)
+    df_logs_part = pd.DataFrame(log_rows, columns=list(log_columns))
+    df_logs_part['time_server_parsed'] = find_date_series(df_logs_part['time_server'], unit='ms')
+    df_logs_part['time_client_parsed'] = find_date_series(df_logs_part['time_client'], unit='ms')
+    return df_logs_part
+
+
+def accumulate_appends(logs, column_names):
+    # The loop used before, limited to the event types build_synthetic_logs generates
+    df_logs_part = pd.DataFrame(columns=column_names)
+    for data_log in logs:
+        row = {
+            'worker_id': 'WORKER',
+            'paid': True,
+            'task_name': data_log['task'],
+            'batch_name': data_log['batch'],
+            'unit_id': data_log['unit_id'],
+            'task_started': True,
+            'sequence': data_log['sequence'],
+            'time_server': data_log['time_server'],
+            'time_server_parsed': find_date_string(datetime.fromtimestamp(float(data_log['time_server']) / 1000, timezone('GMT')).strftime('%c')),
+            'time_client': data_log['time_client'],
+            'time_client_parsed': find_date_string(datetime.fromtimestamp(float(data_log['time_client']) / 1000, timezone('GMT')).strftime('%c')),
+            'type': data_log['type'],
+        }
+        log_details = data_log['details']
+        if log_details:
+            if data_log['type'] == 'keySequence':
+                if 'log_section' not in df_logs_part.columns:
+                    df_logs_part['log_section'] = np.nan
+                if 'log_key_sequence_index' not in df_logs_part.columns:
+                    df_logs_part['log_key_sequence_index'] = np.nan
+                if 'log_key_sequence_timestamp' not in df_logs_part.columns:
+                    df_logs_part['log_key_sequence_timestamp'] = np.nan
+                if 'log_key_sequence_key' not in df_logs_part.columns:
+                    df_logs_part['log_key_sequence_key'] = np.nan
+                if 'log_sentence' not in df_logs_part.columns:
+                    df_logs_part['log_sentence'] = np.nan
+                row['log_section'] = log_details['section']
+                row['log_sentence'] = log_details['sentence']
+                for index, key_sequence in enumerate(log_details['keySequence']):
+                    row['log_key_sequence_index'] = index
+                    row['log_key_sequence_timestamp'] = key_sequence['timeStamp']
+                    row['log_key_sequence_key'] = key_sequence['key'] if 'key' in key_sequence else np.nan
+                    df_logs_part.loc[len(df_logs_part)] = row
+            elif data_log['type'] == 'movements':
+                for attribute, value in log_details.items():
+                    attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
+                    attribute_parsed = f"log_{attribute_parsed}"
+                    if type(value) != dict and type(value) != list:
+                        if attribute_parsed not in df_logs_part.columns:
+                            df_logs_part[attribute_parsed] = np.nan
+                        row[attribute_parsed] = value
+                for movement_data in log_details['points']:
+                    for attribute, value in movement_data.items():
+                        attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
+                        if type(value) == dict:
+                            for attribute_sub, value_sub in value.items():
+                                attribute_sub_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute_sub).lower()
+                                attribute_sub_parsed = f"log_point_{attribute_parsed}_{attribute_sub_parsed}"
+                                if attribute_sub_parsed not in df_logs_part.columns:
+                                    df_logs_part[attribute_sub_parsed] = np.nan
+                                row[attribute_sub_parsed] = value_sub
+                        else:
+                            attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
+                            attribute_parsed = f"log_point_{attribute_parsed}"
+                            if attribute_parsed not in df_logs_part.columns:
+                                df_logs_part[attribute_parsed] = np.nan
+                            row[attribute_parsed] = value
+                    df_logs_part.loc[len(df_logs_part)] = row
+            elif data_log['type'] == 'click':
+                for attribute, value in log_details.items():
+                    attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
+                    attribute_parsed = f"log_{attribute_parsed}"
+                    if type(value) != dict and type(value) != list:
+                        if attribute_parsed not in df_logs_part.columns:
+                            df_logs_part[attribute_parsed] = np.nan
+                        row[attribute_parsed] = value
+                for attribute, value in log_details['target'].items():
+                    attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
+                    attribute_parsed = f"log_target_{attribute_parsed}"
+                    if attribute_parsed not in df_logs_part.columns:
+                        df_logs_part[attribute_parsed] = np.nan
+                    row[attribute_parsed] = value
+                df_logs_part.loc[len(df_logs_part)] = row
+            elif data_log['type'] == 'scroll':
+                for attribute, value in log_details.items():
+                    attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
+                    if attribute_parsed not in df_logs_part.columns:
+                        df_logs_part[attribute_parsed] = np.nan
+                    row[attribute_parsed] = value
+                df_logs_part.loc[len(df_logs_part)] = row
+            elif data_log['type'] == 'selection':
+                for attribute, value in log_details.items():
+                    attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
+                    if attribute_parsed not in df_logs_part.columns:
+                        df_logs_part[attribute_parsed] = np.nan
+                    if attribute_parsed == 'selected':
+                        row[attribute_parsed] = value.replace("\n", '')
+                df_logs_part.loc[len(df_logs_part)] = row
+            elif data_log['type'] == 'query':
+                if 'log_section' not in df_logs_part.columns:
+                    df_logs_part['log_section'] = np.nan
+                if 'log_query' not in df_logs_part.columns:
+                    df_logs_part['log_query'] = np.nan
+                row['log_section'] = log_details['section']
+                row['log_query_text'] = log_details['query']['text']
+                row['log_query_text_encoded'] = log_details['query']['encoded']
+                df_logs_part.loc[len(df_logs_part)] = row
+        df_logs_part.loc[len(df_logs_part)] = row
+    return df_logs_part
+
+
+def serialize_partial(df_logs_part):
+    # Partials are only ever read back from their CSV, so that is where the two versions are compared
+    return pd.read_csv(io.StringIO(df_logs_part.to_csv(index=False)))
+
+
+if __name__ == '__main__':
+
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    events_baseline = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    column_names = ['worker_id', 'paid', 'task_name', 'batch_name', 'unit_id', 'task_started', 'sequence', 'type', 'time_server', 'time_client', 'time_server_parsed', 'time_client_parsed']
+    flatteners = load_log_flatteners()
+
+    for events_current, baseline in [(events_baseline, True), (events, False)]:
+        logs = build_synthetic_logs(events_current)
+        start = time_mod()
+        df_buffer = accumulate_buffer(flatteners, logs, column_names)
+        elapsed_buffer = time_mod() - start
+        print(f"{events_current} events, {len(df_buffer)} rows, row buffer: {elapsed_buffer:.2f}s ({events_current / elapsed_buffer:.0f} events/s)")
+        if baseline:
+            start = time_mod()
+            df_appends = accumulate_appends(logs, column_names)
+            elapsed_appends = time_mod() - start
+            print(f"{events_current} events, {len(df_appends)} rows, .loc appends: {elapsed_appends:.2f}s ({events_current / elapsed_appends:.0f} events/s)")
+            pd.testing.assert_frame_equal(serialize_partial(df_buffer), serialize_partial(df_appends))
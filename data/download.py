@@ -3,9 +3,16 @@
 
 # Standard library imports
 import asyncio
+import codecs
 import csv
+import hashlib
+import heapq
+import io
 import json
+import logging
+import multiprocessing
 import os
+import pickle
 import pprint
 import re
 import shutil
@@ -13,8 +20,10 @@ import sys
 import uuid
 import warnings
 import xml.etree.ElementTree as Xml
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from distutils.util import strtobool
+from functools import lru_cache
 from glob import glob
 from pathlib import Path
 from time import time as time_mod
@@ -24,8 +33,11 @@ import aiohttp
 import boto3
 import chardet
 import ipinfo
+import lxml.html
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pycountry
 import requests
 from tqdm import tqdm
@@ -39,6 +51,7 @@ from aiohttp import (
 )
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from pypdf import PdfReader
 from pytz import timezone
 from rich.columns import Columns
 from rich.console import Console
@@ -46,15 +59,31 @@ from urllib.parse import urlparse
 
 # Local application imports
 from data.shared import (
+    append_dataframe_rows,
+    arrow_normalize,
+    arrow_type_for,
     camel_to_snake,
+    convert_csv_dataframes,
+    dataframe_extension,
+    enrichment_cache_connect,
+    enrichment_cache_evict,
+    enrichment_cache_get,
+    enrichment_cache_set,
+    find_date_series,
     find_date_string,
+    find_units_status,
     flatten,
+    load_dataframe,
     merge_dicts,
     move_dict_key,
+    parse_retry_after,
     read_json,
     remove_json,
     rename_dict_key,
     sanitize_string,
+    save_dataframe,
+    url_row_key_matchable,
+    url_row_try_value,
 )
 
 pd.set_option('display.max_columns', None)
@@ -62,6 +91,8 @@ pd.set_option('display.max_columns', None)
 warnings.simplefilter(action='ignore', category=FutureWarning)
 pd.options.mode.chained_assignment = None
 warnings.simplefilter(action='ignore', category=pd.errors.PerformanceWarning)
+# Malformed crawled PDFs are reported in workers_crawling_text rather than on the console
+logging.getLogger('pypdf').setLevel(logging.ERROR)
 
 console = Console()
 pp = pprint.PrettyPrinter(indent=4)
@@ -103,6 +134,29 @@ admin_password = os.getenv('admin_password')
 server_config = os.getenv('server_config')
 enable_solver = strtobool(os.getenv('enable_solver')) if os.getenv('enable_solver') is not None else False
 enable_crawling = strtobool(os.getenv('enable_crawling')) if os.getenv('enable_crawling') is not None else False
+snapshot_threads = int(os.getenv('snapshot_threads')) if os.getenv('snapshot_threads') is not None else 1
+snapshot_scan = strtobool(os.getenv('snapshot_scan')) if os.getenv('snapshot_scan') is not None else False
+snapshot_scan_segments = int(os.getenv('snapshot_scan_segments')) if os.getenv('snapshot_scan_segments') is not None else 8
+snapshot_cache_size = int(os.getenv('snapshot_cache_size')) if os.getenv('snapshot_cache_size') is not None else 256
+enrichment_cache_path = os.getenv('enrichment_cache_path') if os.getenv('enrichment_cache_path') is not None else f"{DATA_DIR / 'result' / 'enrichment_cache.sqlite'}"
+enrichment_cache_ttl = float(os.getenv('enrichment_cache_ttl')) * 86400 if os.getenv('enrichment_cache_ttl') is not None else 30 * 86400
+enrichment_cache_size = int(os.getenv('enrichment_cache_size')) if os.getenv('enrichment_cache_size') is not None else 100000
+enrichment_prefetch = strtobool(os.getenv('enrichment_prefetch')) if os.getenv('enrichment_prefetch') is not None else True
+enrichment_concurrency = int(os.getenv('enrichment_concurrency')) if os.getenv('enrichment_concurrency') is not None else 4
+enrichment_rate_limit = float(os.getenv('enrichment_rate_limit')) if os.getenv('enrichment_rate_limit') is not None else 5
+enrichment_retries = int(os.getenv('enrichment_retries')) if os.getenv('enrichment_retries') is not None else 3
+dataframe_chunk_size = int(os.getenv('dataframe_chunk_size')) if os.getenv('dataframe_chunk_size') is not None else 50000
+log_processes = int(os.getenv('log_processes')) if os.getenv('log_processes') is not None else 1
+crawl_workers = int(os.getenv('crawl_workers')) if os.getenv('crawl_workers') is not None else 100
+crawl_host_concurrency = int(os.getenv('crawl_host_concurrency')) if os.getenv('crawl_host_concurrency') is not None else 16
+crawl_retries = int(os.getenv('crawl_retries')) if os.getenv('crawl_retries') is not None else 3
+crawl_storage = os.getenv('crawl_storage') if os.getenv('crawl_storage') is not None else 'files'
+crawl_compression = os.getenv('crawl_compression') if os.getenv('crawl_compression') is not None else 'zstd'
+crawl_refresh = strtobool(os.getenv('crawl_refresh')) if os.getenv('crawl_refresh') is not None else False
+crawl_text_processes = int(os.getenv('crawl_text_processes')) if os.getenv('crawl_text_processes') is not None else os.cpu_count()
+crawl_max_body_size = float(os.getenv('crawl_max_body_size')) * 1024 * 1024 if os.getenv('crawl_max_body_size') is not None else 50 * 1024 * 1024
+dataframe_format = os.getenv('dataframe_format') if os.getenv('dataframe_format') is not None else 'csv'
+dataframe_compression = os.getenv('dataframe_compression') if os.getenv('dataframe_compression') is not None else 'zstd'
 aws_region = os.getenv('aws_region')
 aws_private_bucket = os.getenv('aws_private_bucket')
 aws_deploy_bucket = os.getenv('aws_deploy_bucket')
@@ -129,6 +183,7 @@ data_dir = result_root / "Data"
 crawling_dir = result_root / "Crawling"
 crawling_source_dir = crawling_dir / "Source"
 crawling_metadata_dir = crawling_dir / "Metadata"
+crawling_store_dir = crawling_dir / "Store"
 logs_partial_dir = models_dir / "Logs-Partial"
 task_config_dir = result_root / "Task"
 
@@ -140,25 +195,30 @@ data_path = f"{data_dir}/"
 crawling_path = f"{crawling_dir}/"
 crawling_path_source = f"{crawling_source_dir}/"
 crawling_path_metadata = f"{crawling_metadata_dir}/"
+crawling_path_store = f"{crawling_store_dir}/"
+crawling_metadata_index_path = f"{crawling_metadata_dir / 'index.jsonl'}"
+crawling_journal_path = f"{crawling_dir / 'journal.jsonl'}"
+crawl_store_extension = 'gz' if crawl_compression == 'gzip' else 'zst'
 df_log_partial_folder_path = f"{logs_partial_dir}/"
 task_config_folder = f"{task_config_dir}/"
 
-# Output CSV paths
-df_mturk_data_path = f"{models_dir / 'workers_mturk_data.csv'}"
-df_prolific_study_data_path = f"{models_dir / 'workers_prolific_study_data.csv'}"
-df_prolific_demographic_data_path = f"{models_dir / 'workers_prolific_demographic_data.csv'}"
-df_acl_path = f"{models_dir / 'workers_acl.csv'}"
-df_ip_path = f"{models_dir / 'workers_ip_addresses.csv'}"
-df_uag_path = f"{models_dir / 'workers_user_agents.csv'}"
-df_docs_path = f"{models_dir / 'workers_documents.csv'}"
-df_log_path = f"{models_dir / 'workers_logs.csv'}"
-df_quest_path = f"{models_dir / 'workers_questionnaire.csv'}"
-df_comm_path = f"{models_dir / 'workers_comments.csv'}"
-df_data_path = f"{models_dir / 'workers_answers.csv'}"
-df_notes_path = f"{models_dir / 'workers_notes.csv'}"
-df_dim_path = f"{models_dir / 'workers_dimensions_selection.csv'}"
-df_url_path = f"{models_dir / 'workers_urls.csv'}"
-df_crawl_path = f"{models_dir / 'workers_crawling.csv'}"
+# Output dataframe paths
+df_mturk_data_path = f"{models_dir / 'workers_mturk_data'}.{dataframe_extension(dataframe_format)}"
+df_prolific_study_data_path = f"{models_dir / 'workers_prolific_study_data'}.{dataframe_extension(dataframe_format)}"
+df_prolific_demographic_data_path = f"{models_dir / 'workers_prolific_demographic_data'}.{dataframe_extension(dataframe_format)}"
+df_acl_path = f"{models_dir / 'workers_acl'}.{dataframe_extension(dataframe_format)}"
+df_ip_path = f"{models_dir / 'workers_ip_addresses'}.{dataframe_extension(dataframe_format)}"
+df_uag_path = f"{models_dir / 'workers_user_agents'}.{dataframe_extension(dataframe_format)}"
+df_docs_path = f"{models_dir / 'workers_documents'}.{dataframe_extension(dataframe_format)}"
+df_log_path = f"{models_dir / 'workers_logs'}.{dataframe_extension(dataframe_format)}"
+df_quest_path = f"{models_dir / 'workers_questionnaire'}.{dataframe_extension(dataframe_format)}"
+df_comm_path = f"{models_dir / 'workers_comments'}.{dataframe_extension(dataframe_format)}"
+df_data_path = f"{models_dir / 'workers_answers'}.{dataframe_extension(dataframe_format)}"
+df_notes_path = f"{models_dir / 'workers_notes'}.{dataframe_extension(dataframe_format)}"
+df_dim_path = f"{models_dir / 'workers_dimensions_selection'}.{dataframe_extension(dataframe_format)}"
+df_url_path = f"{models_dir / 'workers_urls'}.{dataframe_extension(dataframe_format)}"
+df_crawl_path = f"{models_dir / 'workers_crawling'}.{dataframe_extension(dataframe_format)}"
+df_crawl_text_path = f"{models_dir / 'workers_crawling_text'}.{dataframe_extension(dataframe_format)}"
 
 # Filenames
 filename_hits_config = "hits.json"
@@ -177,10 +237,19 @@ os.makedirs(folder_result_path, exist_ok=True)
 os.makedirs(models_path, exist_ok=True)
 os.makedirs(resources_path, exist_ok=True)
 os.makedirs(data_path, exist_ok=True)
+Path(enrichment_cache_path).parent.mkdir(parents=True, exist_ok=True)
+enrichment_cache = enrichment_cache_connect(enrichment_cache_path)
 if enable_crawling:
     os.makedirs(crawling_path, exist_ok=True)
     os.makedirs(crawling_path_source, exist_ok=True)
     os.makedirs(crawling_path_metadata, exist_ok=True)
+    if crawl_storage == 'store':
+        os.makedirs(crawling_path_store, exist_ok=True)
+
+if dataframe_format == 'parquet':
+    # Results serialized as CSV by previous runs are converted once, so that resuming keeps working
+    for parquet_path in convert_csv_dataframes(models_path, dataframe_compression):
+        console.print(f"Dataframe converted to Parquet: [cyan]{parquet_path}[/cyan]")
 
 if profile_name is None:
     profile_name = 'default'
@@ -263,6 +332,106 @@ for current_batch_name in task_batch_names:
         console.print(f"Task configuration for batch [green]{current_batch_name}[/green] [yellow]already detected[/yellow], skipping download")
 
 
+ipgeolocation_endpoints = {
+    'ipgeo': ('geo_',),
+    'timezone': ('timezone_', 'geo_'),
+    'astronomy': ('location_',),
+}
+
+
+def build_ipgeolocation_url(endpoint, worker_ip):
+    if endpoint == 'ipgeo':
+        return f"https://api.ipgeolocation.io/ipgeo?apiKey={ip_geolocation_api_key}&ip={worker_ip}&include=hostnameFallbackLive,security"
+    return f"https://api.ipgeolocation.io/{endpoint}?apiKey={ip_geolocation_api_key}&ip={worker_ip}"
+
+
+def process_ipinfo_data(details):
+    data_fetched = flatten(details)
+    rename_dict_key(data_fetched, 'location_name', 'city')
+    rename_dict_key(data_fetched, 'country_currency_code_iso3', 'country_currency_code')
+    rename_dict_key(data_fetched, 'country_code_iso2', 'country')
+    rename_dict_key(data_fetched, 'country_flag_emoji_unicode', 'country_flag_unicode')
+    rename_dict_key(data_fetched, 'country_is_eu', 'isEU')
+    rename_dict_key(data_fetched, 'location_coordinates', 'loc')
+    rename_dict_key(data_fetched, 'location_postal_code', 'postal')
+    rename_dict_key(data_fetched, 'provider_name', 'org')
+    rename_dict_key(data_fetched, 'region_name', 'region')
+    rename_dict_key(data_fetched, 'provider_name', 'org')
+    rename_dict_key(data_fetched, 'timezone_name', 'timezone')
+    return data_fetched
+
+
+def process_ipgeolocation_data(endpoint, worker_ip, status_code, reason, payload):
+    data_fixed = {}
+    if status_code == 423:
+        if endpoint == 'ipgeo':
+            console.print(f"Bogon detected: {worker_ip}")
+        return data_fixed
+    if status_code != 200:
+        raise ValueError(
+            f"Request to IP Geolocation service ({endpoint} endpoint) failed with error code {status_code} and reason: `{reason}`. Remove of replace your `ip_geolocation_api_key`")
+    prefixes = ipgeolocation_endpoints[endpoint]
+    for key, item in flatten(payload).items():
+        if key.startswith(prefixes):
+            key_fixed = key
+            for prefix in prefixes:
+                key_fixed = key_fixed.replace(prefix, '')
+            data_fixed[key_fixed] = item
+        else:
+            data_fixed[key] = item
+    return data_fixed
+
+
+def process_ipapi_data(payload):
+    data_fetched = flatten(payload)
+    if 'success' in data_fetched.keys():
+        if not data_fetched['success']:
+            raise ValueError(f"Request to IPApi IP detection service failed with error code {data_fetched['error_code']}. Remove of replace your `ipapi_api_key`")
+    rename_dict_key(data_fetched, 'country_code_iso2', 'country_code')
+    rename_dict_key(data_fetched, 'country_capital', 'location_capital')
+    rename_dict_key(data_fetched, 'ip_address_type', 'type')
+    rename_dict_key(data_fetched, 'location_name', 'city')
+    rename_dict_key(data_fetched, 'location_postal_code', 'zip')
+    rename_dict_key(data_fetched, 'country_flag', 'location_country_flag')
+    rename_dict_key(data_fetched, 'country_flag_url', 'country_flag')
+    rename_dict_key(data_fetched, 'country_flag_emoji', 'location_country_flag_emoji')
+    rename_dict_key(data_fetched, 'country_flag_emoji_unicode', 'location_country_flag_emoji_unicode')
+    if 'location_languages' in data_fetched:
+        location_languages = data_fetched.pop('location_languages')
+        data_fetched['location_languages'] = []
+        if location_languages is not None:
+            for index_lang, lang_data in enumerate(location_languages):
+                location_language = {}
+                location_language["location_language_index"] = index_lang
+                location_language["location_language_code_iso2"] = lang_data['code']
+                language_data = pycountry.languages.get(alpha_2=location_language["location_language_code_iso2"])
+                location_language[f"location_language_code_iso3"] = language_data.alpha_3
+                location_language[f"location_language_scope"] = language_data.scope
+                location_language[f"location_language_type"] = language_data.type
+                data_fetched['location_languages'].append(location_language)
+    return data_fetched
+
+
+def process_userstack_data(payload):
+    data_fetched = flatten(payload)
+    if 'success' in data_fetched.keys():
+        if not data_fetched['success']:
+            raise ValueError(f"Request to Userstack UAG detection service failed with error code {data_fetched['error_code']}. Remove of replace your `user_stack_token`")
+    rename_dict_key(data_fetched, 'ua_type', 'type')
+    rename_dict_key(data_fetched, 'ua_url', 'url')
+    rename_dict_key(data_fetched, 'device_is_crawler', 'crawler_is_crawler')
+    data_fetched.pop('brand')
+    data_fetched.pop('name')
+    return data_fetched
+
+
+def process_ipgeolocation_uag_data(status_code, reason, payload):
+    if status_code != 200:
+        raise ValueError(
+            f"Request to IP Geolocation UAG detection service (user-agent endpoint) failed with error code {status_code} and reason: `{reason}`. Remove of replace your `ip_geolocation_api_key`")
+    return flatten(payload)
+
+
 def fetch_uag_data(worker_id, worker_uag, properties_fetched=None):
     data = {}
     properties_moved = []
@@ -274,26 +443,18 @@ def fetch_uag_data(worker_id, worker_uag, properties_fetched=None):
             try:
                 ua_data = []
                 if user_stack_token:
-                    url = f"http://api.userstack.com/detect?access_key={user_stack_token}&ua={worker_uag}"
-                    response = requests.get(url)
-                    data_fetched = flatten(response.json())
-                    if 'success' in data_fetched.keys():
-                        if not data_fetched['success']:
-                            raise ValueError(f"Request to Userstack UAG detection service failed with error code {data_fetched['error_code']}. Remove of replace your `user_stack_token`")
-                    rename_dict_key(data_fetched, 'ua_type', 'type')
-                    rename_dict_key(data_fetched, 'ua_url', 'url')
-                    rename_dict_key(data_fetched, 'device_is_crawler', 'crawler_is_crawler')
-                    data_fetched.pop('brand')
-                    data_fetched.pop('name')
+                    data_fetched = enrichment_cache_get(enrichment_cache, worker_uag, 'userstack', enrichment_cache_ttl)
+                    if data_fetched is None:
+                        response = requests.get("http://api.userstack.com/detect", params={'access_key': user_stack_token, 'ua': worker_uag})
+                        data_fetched = process_userstack_data(response.json())
+                        enrichment_cache_set(enrichment_cache, worker_uag, 'userstack', data_fetched)
                     ua_data.append(data_fetched)
                 if ip_geolocation_api_key:
-                    url = f"https://api.ipgeolocation.io/user-agent?apiKey={ip_geolocation_api_key}"
-                    response = requests.get(url, headers={'User-Agent': worker_uag})
-                    if response.status_code != 200:
-                        raise ValueError(
-                            f"Request to IP Geolocation UAG detection service (user-agent endpoint) failed with error code {response.status_code} and reason: `{response.text}`. Remove of replace your `ip_geolocation_api_key`")
-                    else:
-                        data_fetched = flatten(requests.get(url, headers={'User-Agent': worker_uag}).json())
+                    data_fetched = enrichment_cache_get(enrichment_cache, worker_uag, 'ipgeolocation_user_agent', enrichment_cache_ttl)
+                    if data_fetched is None:
+                        response = requests.get(f"https://api.ipgeolocation.io/user-agent?apiKey={ip_geolocation_api_key}", headers={'User-Agent': worker_uag})
+                        data_fetched = process_ipgeolocation_uag_data(response.status_code, response.text, response.json() if response.status_code == 200 else None)
+                        enrichment_cache_set(enrichment_cache, worker_uag, 'ipgeolocation_user_agent', data_fetched)
                     ua_data.append(data_fetched)
                 if properties_fetched is not None:
                     ua_cf_data = {}
@@ -374,100 +535,27 @@ def fetch_ip_data(worker_id, worker_ip, properties_fetched=None):
             try:
                 ip_data = []
                 if ip_info_token:
-                    ip_info_handler = ipinfo.getHandler(ip_info_token)
-                    data_fetched = flatten(ip_info_handler.getDetails(worker_ip).all)
-                    rename_dict_key(data_fetched, 'location_name', 'city')
-                    rename_dict_key(data_fetched, 'country_currency_code_iso3', 'country_currency_code')
-                    rename_dict_key(data_fetched, 'country_code_iso2', 'country')
-                    rename_dict_key(data_fetched, 'country_flag_emoji_unicode', 'country_flag_unicode')
-                    rename_dict_key(data_fetched, 'country_is_eu', 'isEU')
-                    rename_dict_key(data_fetched, 'location_coordinates', 'loc')
-                    rename_dict_key(data_fetched, 'location_postal_code', 'postal')
-                    rename_dict_key(data_fetched, 'provider_name', 'org')
-                    rename_dict_key(data_fetched, 'region_name', 'region')
-                    rename_dict_key(data_fetched, 'provider_name', 'org')
-                    rename_dict_key(data_fetched, 'timezone_name', 'timezone')
+                    data_fetched = enrichment_cache_get(enrichment_cache, worker_ip, 'ipinfo', enrichment_cache_ttl)
+                    if data_fetched is None:
+                        ip_info_handler = ipinfo.getHandler(ip_info_token)
+                        data_fetched = process_ipinfo_data(ip_info_handler.getDetails(worker_ip).all)
+                        enrichment_cache_set(enrichment_cache, worker_ip, 'ipinfo', data_fetched)
                     ip_data.append(data_fetched)
                 if ip_geolocation_api_key:
-                    url = f"https://api.ipgeolocation.io/ipgeo?apiKey={ip_geolocation_api_key}&ip={worker_ip}&include=hostnameFallbackLive,security"
-                    data_fixed = {}
-                    response = requests.get(url)
-                    if response.status_code == 423:
-                        console.print(f"Bogon detected: {worker_ip}")
-                    else:
-                        if response.status_code != 200:
-                            raise ValueError(
-                                f"Request to IP Geolocation service (ipgeo endpoint) failed with error code {response.status_code} and reason: `{response.text}`. Remove of replace your `ip_geolocation_api_key`")
-                        else:
-                            for key, item in flatten(response.json()).items():
-                                if key.startswith('geo_'):
-                                    data_fixed[key.replace('geo_', '')] = item
-                                else:
-                                    data_fixed[key] = item
-                    ip_data.append(data_fixed)
-                    url = f"https://api.ipgeolocation.io/timezone?apiKey={ip_geolocation_api_key}&ip={worker_ip}"
-                    data_fixed = {}
-                    response = requests.get(url)
-                    if response.status_code == 423:
-                        pass
-                    else:
-                        if response.status_code != 200:
-                            raise ValueError(
-                                f"Request to IP Geolocation service (timezone endpoint) failed with error code {response.status_code} and reason: `{response.text}`. Remove of replace your `ip_geolocation_api_key`")
-                        else:
-                            for key, item in flatten(response.json()).items():
-                                if key.startswith('timezone_') or key.startswith('geo_'):
-                                    key_fixed = key.replace('timezone_', '').replace('geo_', '')
-                                    data_fixed[key_fixed] = item
-                                else:
-                                    data_fixed[key] = item
-                    ip_data.append(data_fixed)
-                    url = f"https://api.ipgeolocation.io/astronomy?apiKey={ip_geolocation_api_key}&ip={worker_ip}"
-                    data_fixed = {}
-                    response = requests.get(url)
-                    if response.status_code == 423:
-                        pass
-                    else:
-                        if response.status_code != 200:
-                            raise ValueError(
-                                f"Request to IP Geolocation service (astronomy endpoint) failed with error code {response.status_code} and reason: `{response.text}`. Remove of replace your `ip_geolocation_api_key`")
-                        else:
-                            for key, item in flatten(response.json()).items():
-                                if key.startswith('location_'):
-                                    data_fixed[key.replace('location_', '')] = item
-                                else:
-                                    data_fixed[key] = item
-                    ip_data.append(data_fixed)
+                    for endpoint in ipgeolocation_endpoints:
+                        provider = f"ipgeolocation_{endpoint}"
+                        data_fixed = enrichment_cache_get(enrichment_cache, worker_ip, provider, enrichment_cache_ttl)
+                        if data_fixed is None:
+                            response = requests.get(build_ipgeolocation_url(endpoint, worker_ip))
+                            data_fixed = process_ipgeolocation_data(endpoint, worker_ip, response.status_code, response.text, response.json() if response.status_code == 200 else None)
+                            enrichment_cache_set(enrichment_cache, worker_ip, provider, data_fixed)
+                        ip_data.append(data_fixed)
                 if ip_api_api_key:
-                    url = f"http://api.ipapi.com/{worker_ip}?access_key={ip_api_api_key}"
-                    response = requests.get(url)
-                    data_fetched = flatten(response.json())
-                    if 'success' in data_fetched.keys():
-                        if not data_fetched['success']:
-                            raise ValueError(f"Request to IPApi IP detection service failed with error code {data_fetched['error_code']}. Remove of replace your `ipapi_api_key`")
-                    data_fetched = flatten(requests.get(url).json())
-                    rename_dict_key(data_fetched, 'country_code_iso2', 'country_code')
-                    rename_dict_key(data_fetched, 'country_capital', 'location_capital')
-                    rename_dict_key(data_fetched, 'ip_address_type', 'type')
-                    rename_dict_key(data_fetched, 'location_name', 'city')
-                    rename_dict_key(data_fetched, 'location_postal_code', 'zip')
-                    rename_dict_key(data_fetched, 'country_flag', 'location_country_flag')
-                    rename_dict_key(data_fetched, 'country_flag_url', 'country_flag')
-                    rename_dict_key(data_fetched, 'country_flag_emoji', 'location_country_flag_emoji')
-                    rename_dict_key(data_fetched, 'country_flag_emoji_unicode', 'location_country_flag_emoji_unicode')
-                    if 'location_languages' in data_fetched:
-                        location_languages = data_fetched.pop('location_languages')
-                        data_fetched['location_languages'] = []
-                        if location_languages is not None:
-                            for index_lang, lang_data in enumerate(location_languages):
-                                location_language = {}
-                                location_language["location_language_index"] = index_lang
-                                location_language["location_language_code_iso2"] = lang_data['code']
-                                language_data = pycountry.languages.get(alpha_2=location_language["location_language_code_iso2"])
-                                location_language[f"location_language_code_iso3"] = language_data.alpha_3
-                                location_language[f"location_language_scope"] = language_data.scope
-                                location_language[f"location_language_type"] = language_data.type
-                                data_fetched['location_languages'].append(location_language)
+                    data_fetched = enrichment_cache_get(enrichment_cache, worker_ip, 'ipapi', enrichment_cache_ttl)
+                    if data_fetched is None:
+                        response = requests.get(f"http://api.ipapi.com/{worker_ip}?access_key={ip_api_api_key}")
+                        data_fetched = process_ipapi_data(response.json())
+                        enrichment_cache_set(enrichment_cache, worker_ip, 'ipapi', data_fetched)
                     ip_data.append(data_fetched)
                 country_code = None
                 for ip_data_partial in ip_data:
@@ -631,377 +719,631 @@ worker_counter = 0
 worker_snapshots_with_data_counter = 0
 worker_snapshots_without_data_counter = 0
 worker_properties_unhandled = []
-with console.status(f"Workers Amount: {len(worker_identifiers)}", spinner="aesthetic") as status:
-    status.start()
+# Items of the Data and Logger tables grouped by worker, filled only when snapshot_scan is enabled
+worker_items_scanned = {}
 
-    for worker_id in tqdm(worker_identifiers):
-
-        worker_snapshot = []
-        worker_snapshot_path = f"result/{task_name}/Data/{worker_id}.json"
-        worker_folder_s3 = f"{aws_private_bucket}/{task_name}/Data/{worker_id}/"
-
-        status.update(f"Downloading worker data, Identifier: {worker_id}, Total: {worker_counter}/{len(worker_identifiers)}")
-
-        if not os.path.exists(worker_snapshot_path):
-
-            worker_data = {}
-            for table_name in task_data_tables:
-                worker_data[table_name] = []
-            for table_name in task_data_tables:
-                paginator = dynamo_db.get_paginator('query')
-                for page in paginator.paginate(
-                    TableName=table_name,
-                    KeyConditionExpression="identifier = :worker",
-                    ExpressionAttributeValues={
-                        ":worker": {'S': worker_id}
-                    }, Select='ALL_ATTRIBUTES'
-                ):
-                    for item in page['Items']:
-                        worker_data[table_name].append(item)
-
-            worker_snapshot = []
 
-            for data_source, worker_session in worker_data.items():
+def scan_table_segment(table_name, key_name, segment, workers_pending):
+    items_segment = {}
+    paginator = dynamo_db.get_paginator('scan')
+    for page in paginator.paginate(TableName=table_name, Segment=segment, TotalSegments=snapshot_scan_segments, Select='ALL_ATTRIBUTES'):
+        for item in page['Items']:
+            worker_id = item[key_name]['S']
+            if worker_id in workers_pending:
+                items_segment.setdefault(worker_id, []).append(item)
+    return items_segment
+
+
+def scan_worker_items(table_name, key_name, workers_pending):
+    items_workers = {}
+    with ThreadPoolExecutor(max_workers=snapshot_scan_segments) as executor:
+        futures = [executor.submit(scan_table_segment, table_name, key_name, segment, workers_pending) for segment in range(snapshot_scan_segments)]
+        for future in as_completed(futures):
+            for worker_id, items in future.result().items():
+                items_workers.setdefault(worker_id, []).extend(items)
+    # A query returns the items of a worker sorted by their range key, which a scan does not
+    for items in items_workers.values():
+        items.sort(key=lambda item: item['sequence']['S'])
+    return items_workers
+
+
+def fetch_worker_items(table_name, key_name, worker_id):
+    if table_name in worker_items_scanned:
+        return worker_items_scanned[table_name].get(worker_id, [])
+    items = []
+    paginator = dynamo_db.get_paginator('query')
+    for page in paginator.paginate(
+        TableName=table_name,
+        KeyConditionExpression=f"{key_name} = :worker",
+        ExpressionAttributeValues={
+            ":worker": {'S': worker_id}
+        }, Select='ALL_ATTRIBUTES'
+    ):
+        items.extend(page['Items'])
+    return items
+
+
+def fetch_worker_snapshot(worker_id):
+    worker_snapshot_path = f"result/{task_name}/Data/{worker_id}.json"
+
+    if os.path.exists(worker_snapshot_path):
+        return False
+
+    properties_fetched = None
+
+    worker_data = {}
+    for table_name in task_data_tables:
+        worker_data[table_name] = []
+    for table_name in task_data_tables:
+        worker_data[table_name].extend(fetch_worker_items(table_name, 'identifier', worker_id))
+
+    worker_snapshot = []
+
+    for data_source, worker_session in worker_data.items():
+
+        if len(worker_session) > 0:
+
+            table_base_name = "_".join(data_source.split("_")[:-1])
+
+            acl_data_source = None
+            for table_name in task_acl_tables:
+                if table_base_name in table_name:
+                    acl_data_source = table_name
+            log_data_source = None
+            for table_name in task_log_tables:
+                if table_base_name in table_name:
+                    log_data_source = table_name
+
+            task_key_found = False
+
+            data_sequences = {}
+            for element in worker_session:
+                sequence = element['sequence']['S'].split("-")
+                if len(sequence) > 4:
+                    worker_id = sequence[0]
+                    worker_ip = sequence[1]
+                    unit_id = sequence[2]
+                    sequence_key = f"{worker_id}-{worker_ip}-{unit_id}"
+                    if sequence_key not in data_sequences:
+                        data_sequences[sequence_key] = []
+                else:
+                    worker_id = sequence[0]
+                    unit_id = sequence[1]
+                    sequence_key = f"{worker_id}-{unit_id}"
+                    if sequence_key not in data_sequences:
+                        data_sequences[sequence_key] = []
+                data_sequences[sequence_key].append(element)
+
+            for data_sequence_key, worker_session_across_tries in data_sequences.items():
+
+                snapshot = {
+                    "sequence_key": data_sequence_key,
+                    "source_path": worker_snapshot_path,
+                    "source_data": data_source,
+                    "source_acl": acl_data_source,
+                    "source_log": log_data_source,
+                    "data_items": len(worker_session_across_tries),
+                    "task": {},
+                    "worker": {
+                        "identifier": worker_id
+                    },
+                    "ip": {
+                        "info": {},
+                        "serialization": {}
+                    },
+                    "uag": {
+                        "info": {},
+                        "serialization": {}
+                    },
+                    "checks": [],
+                    "questionnaires_answers": [],
+                    "documents_answers": [],
+                    "comments": [],
+                    "logs": [],
+                    "questionnaires": {},
+                    "documents": {},
+                    "dimensions": {}
+                }
 
-                if len(worker_session) > 0:
+                sequence_number = 0
 
-                    table_base_name = "_".join(data_source.split("_")[:-1])
+                for element in worker_session_across_tries:
 
-                    acl_data_source = None
-                    for table_name in task_acl_tables:
-                        if table_base_name in table_name:
-                            acl_data_source = table_name
-                    log_data_source = None
-                    for table_name in task_log_tables:
-                        if table_base_name in table_name:
-                            log_data_source = table_name
+                    sequence = element['sequence']['S'].split("-")
+                    data = json.loads(element['data']['S'])
+                    time = element['time']['S']
 
-                    task_key_found = False
+                    if len(sequence) > 4:
+                        worker_id = sequence[0]
+                        worker_ip = sequence[1]
+                        unit_id = sequence[2]
+                        current_try = sequence[3]
+                        sequence_number_current = sequence[4]
+                    else:
+                        worker_id = sequence[0]
+                        unit_id = sequence[1]
+                        current_try = sequence[2]
+                        sequence_number_current = sequence[3]
+
+                    if data:
+                        if data['info']['element'] == 'data':
+                            if len(data['task'].items()) > 0:
+                                task_key_found = True
+                            for attribute, value in data['task'].items():
+                                if attribute == 'task_id':
+                                    snapshot['task']['task_name'] = value
+                                else:
+                                    snapshot['task'][attribute] = value
+                            snapshot['task']['try_last'] = current_try
+                            snapshot['task']['time_submit'] = time
+                            snapshot['task']['time_submit_parsed'] = find_date_string(time)
+                            snapshot['task']['info'] = data['info']
+                            if 'settings' in snapshot['task']:
+                                settings = snapshot['task'].pop('settings')
+                                snapshot['task']['settings'] = settings
+                            snapshot['questionnaires'] = data.pop('questionnaires')
+                            snapshot['documents'] = data.pop('documents')
+                            snapshot['dimensions'] = data.pop('dimensions')
+                            snapshot['worker'] = data.pop('worker')
+                            if 'propertiesFetched' in snapshot['worker'].keys():
+                                snapshot['worker']['properties_fetched'] = snapshot['worker'].pop('propertiesFetched')
+                            if 'paramsFetched' in snapshot['worker'].keys():
+                                snapshot['worker']['params_fetched'] = snapshot['worker'].pop('paramsFetched')
+                            if 'previousIPAddresses' in snapshot['worker'].keys():
+                                snapshot['worker'].pop('previousIPAddresses')
+                            if 'identifiersProvided' in snapshot['worker'].keys():
+                                snapshot['worker'].pop('identifiersProvided')
+                            snapshot['worker'] = dict(sorted(snapshot['worker'].items()))
+                        elif data['info']['element'] == 'document':
+                            snapshot['documents_answers'].append({
+                                "time_submit": time,
+                                "serialization": data
+                            })
+                        elif data['info']['element'] == 'questionnaire':
+                            snapshot['questionnaires_answers'].append({
+                                "time_submit": time,
+                                "serialization": data
+                            })
+                        elif data['info']['element'] == 'checks':
+                            snapshot['checks'].append({
+                                "time_submit": time,
+                                "serialization": data
+                            })
+                        elif data['info']['element'] == 'comment':
+                            snapshot['comments'].append({
+                                "time_submit": time,
+                                "serialization": data
+                            })
+
+                    if int(sequence_number_current) > int(sequence_number):
+                        if 'try_last' in snapshot['task'].keys():
+                            snapshot['task']['try_last'] = max(int(snapshot['task']['try_last']), int(current_try))
+                        snapshot['task']['unit_id'] = unit_id
+                        sequence_number = sequence_number_current
+
+                if not task_key_found:
+
+                    paginator = dynamo_db.get_paginator('query')
+                    for page in paginator.paginate(
+                        TableName=acl_data_source,
+                        KeyConditionExpression="identifier = :identifier",
+                        ExpressionAttributeValues={
+                            ":identifier": {'S': worker_id}
+                        }, Select='ALL_ATTRIBUTES'
+                    ):
 
-                    data_sequences = {}
-                    for element in worker_session:
-                        sequence = element['sequence']['S'].split("-")
-                        if len(sequence) > 4:
-                            worker_id = sequence[0]
-                            worker_ip = sequence[1]
-                            unit_id = sequence[2]
-                            sequence_key = f"{worker_id}-{worker_ip}-{unit_id}"
-                            if sequence_key not in data_sequences:
-                                data_sequences[sequence_key] = []
-                        else:
-                            worker_id = sequence[0]
-                            unit_id = sequence[1]
-                            sequence_key = f"{worker_id}-{unit_id}"
-                            if sequence_key not in data_sequences:
-                                data_sequences[sequence_key] = []
-                        data_sequences[sequence_key].append(element)
-
-                    for data_sequence_key, worker_session_across_tries in data_sequences.items():
-
-                        snapshot = {
-                            "sequence_key": data_sequence_key,
-                            "source_path": worker_snapshot_path,
-                            "source_data": data_source,
-                            "source_acl": acl_data_source,
-                            "source_log": log_data_source,
-                            "data_items": len(worker_session_across_tries),
-                            "task": {},
-                            "worker": {
-                                "identifier": worker_id
-                            },
-                            "ip": {
-                                "info": {},
-                                "serialization": {}
-                            },
-                            "uag": {
-                                "info": {},
-                                "serialization": {}
-                            },
-                            "checks": [],
-                            "questionnaires_answers": [],
-                            "documents_answers": [],
-                            "comments": [],
-                            "logs": [],
-                            "questionnaires": {},
-                            "documents": {},
-                            "dimensions": {}
-                        }
+                        if len(page['Items']) > 0:
+                            task_key_found = True
 
-                        sequence_number = 0
+                        for item in page['Items']:
 
-                        for element in worker_session_across_tries:
+                            task_name_acl = item['task_name']['S']
+                            batch_name_acl = item['batch_name']['S']
+                            unit_id = item['unit_id']['S']
+                            ip_address = item['ip_address']['S']
+                            user_agent = item['user_agent']['S']
+                            time_arrival = item['time_arrival']['S']
+                            time_arrival_parsed = find_date_string(time_arrival)
 
-                            sequence = element['sequence']['S'].split("-")
-                            data = json.loads(element['data']['S'])
-                            time = element['time']['S']
+                            snapshot['task']['task_name'] = task_name_acl
+                            snapshot['task']['batch_name'] = batch_name_acl
+                            snapshot['task']['unit_id'] = unit_id
+                            snapshot['task']['try_last'] = current_try
+                            snapshot['task']['time_submit'] = time
+                            snapshot['task']['time_submit_parsed'] = find_date_string(time)
 
-                            if len(sequence) > 4:
-                                worker_id = sequence[0]
-                                worker_ip = sequence[1]
-                                unit_id = sequence[2]
-                                current_try = sequence[3]
-                                sequence_number_current = sequence[4]
-                            else:
-                                worker_id = sequence[0]
-                                unit_id = sequence[1]
-                                current_try = sequence[2]
-                                sequence_number_current = sequence[3]
-
-                            if data:
-                                if data['info']['element'] == 'data':
-                                    if len(data['task'].items()) > 0:
-                                        task_key_found = True
-                                    for attribute, value in data['task'].items():
-                                        if attribute == 'task_id':
-                                            snapshot['task']['task_name'] = value
-                                        else:
-                                            snapshot['task'][attribute] = value
-                                    snapshot['task']['try_last'] = current_try
-                                    snapshot['task']['time_submit'] = time
-                                    snapshot['task']['time_submit_parsed'] = find_date_string(time)
-                                    snapshot['task']['info'] = data['info']
-                                    if 'settings' in snapshot['task']:
-                                        settings = snapshot['task'].pop('settings')
-                                        snapshot['task']['settings'] = settings
-                                    snapshot['questionnaires'] = data.pop('questionnaires')
-                                    snapshot['documents'] = data.pop('documents')
-                                    snapshot['dimensions'] = data.pop('dimensions')
-                                    snapshot['worker'] = data.pop('worker')
-                                    if 'propertiesFetched' in snapshot['worker'].keys():
-                                        snapshot['worker']['properties_fetched'] = snapshot['worker'].pop('propertiesFetched')
-                                    if 'paramsFetched' in snapshot['worker'].keys():
-                                        snapshot['worker']['params_fetched'] = snapshot['worker'].pop('paramsFetched')
-                                    if 'previousIPAddresses' in snapshot['worker'].keys():
-                                        snapshot['worker'].pop('previousIPAddresses')
-                                    if 'identifiersProvided' in snapshot['worker'].keys():
-                                        snapshot['worker'].pop('identifiersProvided')
-                                    snapshot['worker'] = dict(sorted(snapshot['worker'].items()))
-                                elif data['info']['element'] == 'document':
-                                    snapshot['documents_answers'].append({
-                                        "time_submit": time,
-                                        "serialization": data
-                                    })
-                                elif data['info']['element'] == 'questionnaire':
-                                    snapshot['questionnaires_answers'].append({
-                                        "time_submit": time,
-                                        "serialization": data
-                                    })
-                                elif data['info']['element'] == 'checks':
-                                    snapshot['checks'].append({
-                                        "time_submit": time,
-                                        "serialization": data
-                                    })
-                                elif data['info']['element'] == 'comment':
-                                    snapshot['comments'].append({
-                                        "time_submit": time,
-                                        "serialization": data
-                                    })
-
-                            if int(sequence_number_current) > int(sequence_number):
-                                if 'try_last' in snapshot['task'].keys():
-                                    snapshot['task']['try_last'] = max(int(snapshot['task']['try_last']), int(current_try))
-                                snapshot['task']['unit_id'] = unit_id
-                                sequence_number = sequence_number_current
-
-                        if not task_key_found:
-
-                            paginator = dynamo_db.get_paginator('query')
-                            for page in paginator.paginate(
-                                TableName=acl_data_source,
-                                KeyConditionExpression="identifier = :identifier",
-                                ExpressionAttributeValues={
-                                    ":identifier": {'S': worker_id}
-                                }, Select='ALL_ATTRIBUTES'
-                            ):
-
-                                if len(page['Items']) > 0:
-                                    task_key_found = True
-
-                                for item in page['Items']:
-
-                                    task_name = item['task_name']['S']
-                                    batch_name = item['batch_name']['S']
-                                    unit_id = item['unit_id']['S']
-                                    ip_address = item['ip_address']['S']
-                                    user_agent = item['user_agent']['S']
-                                    time_arrival = item['time_arrival']['S']
-                                    time_arrival_parsed = find_date_string(time_arrival)
-
-                                    snapshot['task']['task_name'] = task_name
-                                    snapshot['task']['batch_name'] = batch_name
-                                    snapshot['task']['unit_id'] = unit_id
-                                    snapshot['task']['try_last'] = current_try
-                                    snapshot['task']['time_submit'] = time
-                                    snapshot['task']['time_submit_parsed'] = find_date_string(time)
-
-                                    if ip_address is not None:
-                                        if ip_address not in worker_ip_addresses[worker_id]:
-                                            worker_ip_addresses[worker_id][ip_address] = {}
-                                            worker_ip_addresses[worker_id][ip_address]['fetched'] = False
-                                            worker_ip_addresses[worker_id][ip_address]['batches'] = {batch_name: {}}
-                                            worker_ip_addresses[worker_id][ip_address]['batches'][batch_name]['time_submit'] = time_arrival
-                                            worker_ip_addresses[worker_id][ip_address]['batches'][batch_name]['time_submit_parsed'] = time_arrival_parsed
-                                        else:
-                                            worker_ip_addresses[worker_id][ip_address]['batches'][batch_name] = {}
-                                            worker_ip_addresses[worker_id][ip_address]['batches'][batch_name]['time_submit'] = time_arrival
-                                            worker_ip_addresses[worker_id][ip_address]['batches'][batch_name]['time_submit_parsed'] = time_arrival_parsed
-
-                                        if ip_address in worker_ip_batches[worker_id]:
-                                            worker_ip_batches[worker_id][ip_address].append(batch_name)
-                                        else:
-                                            worker_ip_batches[worker_id][ip_address] = [batch_name]
-                                    for ip_address_current in worker_ip_addresses[worker_id]:
-                                        if batch_name in worker_ip_batches[worker_id][ip_address_current]:
-                                            ip_data, properties_moved_ip = fetch_ip_data(worker_id, ip_address_current, properties_fetched)
-                                            worker_ip_addresses[worker_id][ip_address_current]['fetched'] = True
-
-                                    if user_agent is not None:
-                                        if user_agent not in worker_user_agents[worker_id]:
-                                            worker_user_agents[worker_id][user_agent] = {}
-                                            worker_user_agents[worker_id][user_agent]['fetched'] = False
-                                            worker_user_agents[worker_id][user_agent]['batches'] = {batch_name: {}}
-                                            worker_user_agents[worker_id][user_agent]['batches'][batch_name]['time_submit'] = time_arrival
-                                            worker_user_agents[worker_id][user_agent]['batches'][batch_name]['time_submit_parsed'] = time_arrival_parsed
-                                        else:
-                                            worker_user_agents[worker_id][user_agent]['batches'][batch_name] = {}
-                                            worker_user_agents[worker_id][user_agent]['batches'][batch_name]['time_submit'] = time_arrival
-                                            worker_user_agents[worker_id][user_agent]['batches'][batch_name]['time_submit_parsed'] = time_arrival_parsed
-                                        if user_agent in worker_user_agents_batches[worker_id]:
-                                            worker_user_agents_batches[worker_id][user_agent].append(batch_name)
-                                        else:
-                                            worker_user_agents_batches[worker_id][user_agent] = [batch_name]
-                                    for user_agent_current in worker_user_agents[worker_id]:
-                                        if batch_name in worker_user_agents_batches[worker_id][user_agent_current]:
-                                            ua_data, properties_moved_ua = fetch_uag_data(worker_id, user_agent_current, properties_fetched)
-                                            worker_user_agents[worker_id][user_agent_current]['fetched'] = True
-                        if 'params_fetched' in snapshot['worker'].keys():
-                            properties_fetched = snapshot['worker']['properties_fetched']
-                            properties_fetched_copy = snapshot['worker']['properties_fetched'].copy()
-                            ip_address = None
-                            user_agent = None
-                            if 'cf_ip' in properties_fetched:
-                                ip_address = properties_fetched['cf_ip']
-                            elif 'ipify_ip' in properties_fetched:
-                                ip_address = properties_fetched['ipify_ip']
-                            if 'cf_uag' in properties_fetched:
-                                user_agent = properties_fetched['cf_uag']
-                            elif 'ngx_user_agent' in properties_fetched:
-                                user_agent = properties_fetched['ngx_user_agent']
-                            else:
-                                user_agent = properties_fetched['nav_user_agent']
                             if ip_address is not None:
                                 if ip_address not in worker_ip_addresses[worker_id]:
                                     worker_ip_addresses[worker_id][ip_address] = {}
                                     worker_ip_addresses[worker_id][ip_address]['fetched'] = False
-                                    worker_ip_addresses[worker_id][ip_address]['batches'] = {snapshot['task']['batch_name']: {}}
-                                    worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
-                                    worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                                    worker_ip_addresses[worker_id][ip_address]['batches'] = {batch_name_acl: {}}
+                                    worker_ip_addresses[worker_id][ip_address]['batches'][batch_name_acl]['time_submit'] = time_arrival
+                                    worker_ip_addresses[worker_id][ip_address]['batches'][batch_name_acl]['time_submit_parsed'] = time_arrival_parsed
                                 else:
-                                    worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']] = {}
-                                    worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
-                                    worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                                    worker_ip_addresses[worker_id][ip_address]['batches'][batch_name_acl] = {}
+                                    worker_ip_addresses[worker_id][ip_address]['batches'][batch_name_acl]['time_submit'] = time_arrival
+                                    worker_ip_addresses[worker_id][ip_address]['batches'][batch_name_acl]['time_submit_parsed'] = time_arrival_parsed
+
                                 if ip_address in worker_ip_batches[worker_id]:
-                                    worker_ip_batches[worker_id][ip_address].append(snapshot['task']['batch_name'])
+                                    worker_ip_batches[worker_id][ip_address].append(batch_name_acl)
                                 else:
-                                    worker_ip_batches[worker_id][ip_address] = [snapshot['task']['batch_name']]
+                                    worker_ip_batches[worker_id][ip_address] = [batch_name_acl]
                             for ip_address_current in worker_ip_addresses[worker_id]:
-                                if not worker_ip_addresses[worker_id][ip_address_current]['fetched']:
-                                    fetch_ip_data(worker_id, ip_address_current, properties_fetched)
+                                if batch_name_acl in worker_ip_batches[worker_id][ip_address_current]:
+                                    ip_data, properties_moved_ip = fetch_ip_data(worker_id, ip_address_current, properties_fetched)
                                     worker_ip_addresses[worker_id][ip_address_current]['fetched'] = True
+
                             if user_agent is not None:
                                 if user_agent not in worker_user_agents[worker_id]:
                                     worker_user_agents[worker_id][user_agent] = {}
                                     worker_user_agents[worker_id][user_agent]['fetched'] = False
-                                    worker_user_agents[worker_id][user_agent]['batches'] = {snapshot['task']['batch_name']: {}}
-                                    worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
-                                    worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                                    worker_user_agents[worker_id][user_agent]['batches'] = {batch_name_acl: {}}
+                                    worker_user_agents[worker_id][user_agent]['batches'][batch_name_acl]['time_submit'] = time_arrival
+                                    worker_user_agents[worker_id][user_agent]['batches'][batch_name_acl]['time_submit_parsed'] = time_arrival_parsed
                                 else:
-                                    worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']] = {}
-                                    worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
-                                    worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
-
+                                    worker_user_agents[worker_id][user_agent]['batches'][batch_name_acl] = {}
+                                    worker_user_agents[worker_id][user_agent]['batches'][batch_name_acl]['time_submit'] = time_arrival
+                                    worker_user_agents[worker_id][user_agent]['batches'][batch_name_acl]['time_submit_parsed'] = time_arrival_parsed
                                 if user_agent in worker_user_agents_batches[worker_id]:
-                                    worker_user_agents_batches[worker_id][user_agent].append(snapshot['task']['batch_name'])
+                                    worker_user_agents_batches[worker_id][user_agent].append(batch_name_acl)
                                 else:
-                                    worker_user_agents_batches[worker_id][user_agent] = [snapshot['task']['batch_name']]
+                                    worker_user_agents_batches[worker_id][user_agent] = [batch_name_acl]
                             for user_agent_current in worker_user_agents[worker_id]:
-                                if not worker_user_agents[worker_id][user_agent_current]['fetched']:
-                                    fetch_uag_data(worker_id, user_agent_current, properties_fetched)
+                                if batch_name_acl in worker_user_agents_batches[worker_id][user_agent_current]:
+                                    ua_data, properties_moved_ua = fetch_uag_data(worker_id, user_agent_current, properties_fetched)
                                     worker_user_agents[worker_id][user_agent_current]['fetched'] = True
+                if 'params_fetched' in snapshot['worker'].keys():
+                    properties_fetched = snapshot['worker']['properties_fetched']
+                    properties_fetched_copy = snapshot['worker']['properties_fetched'].copy()
+                    ip_address = None
+                    user_agent = None
+                    if 'cf_ip' in properties_fetched:
+                        ip_address = properties_fetched['cf_ip']
+                    elif 'ipify_ip' in properties_fetched:
+                        ip_address = properties_fetched['ipify_ip']
+                    if 'cf_uag' in properties_fetched:
+                        user_agent = properties_fetched['cf_uag']
+                    elif 'ngx_user_agent' in properties_fetched:
+                        user_agent = properties_fetched['ngx_user_agent']
+                    else:
+                        user_agent = properties_fetched['nav_user_agent']
+                    if ip_address is not None:
+                        if ip_address not in worker_ip_addresses[worker_id]:
+                            worker_ip_addresses[worker_id][ip_address] = {}
+                            worker_ip_addresses[worker_id][ip_address]['fetched'] = False
+                            worker_ip_addresses[worker_id][ip_address]['batches'] = {snapshot['task']['batch_name']: {}}
+                            worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
+                            worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                        else:
+                            worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']] = {}
+                            worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
+                            worker_ip_addresses[worker_id][ip_address]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                        if ip_address in worker_ip_batches[worker_id]:
+                            worker_ip_batches[worker_id][ip_address].append(snapshot['task']['batch_name'])
+                        else:
+                            worker_ip_batches[worker_id][ip_address] = [snapshot['task']['batch_name']]
+                    for ip_address_current in worker_ip_addresses[worker_id]:
+                        if not worker_ip_addresses[worker_id][ip_address_current]['fetched']:
+                            fetch_ip_data(worker_id, ip_address_current, properties_fetched)
+                            worker_ip_addresses[worker_id][ip_address_current]['fetched'] = True
+                    if user_agent is not None:
+                        if user_agent not in worker_user_agents[worker_id]:
+                            worker_user_agents[worker_id][user_agent] = {}
+                            worker_user_agents[worker_id][user_agent]['fetched'] = False
+                            worker_user_agents[worker_id][user_agent]['batches'] = {snapshot['task']['batch_name']: {}}
+                            worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
+                            worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
+                        else:
+                            worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']] = {}
+                            worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit'] = snapshot['task']['time_submit']
+                            worker_user_agents[worker_id][user_agent]['batches'][snapshot['task']['batch_name']]['time_submit_parsed'] = snapshot['task']['time_submit_parsed']
 
-                            ip_data, properties_moved_ip = fetch_ip_data(worker_id, ip_address, properties_fetched)
-                            uag_data, properties_moved_uag = fetch_uag_data(worker_id, user_agent, properties_fetched)
-                            worker_ip_addresses[worker_id][ip_address]['fetched'] = True
-                            worker_user_agents[worker_id][user_agent]['fetched'] = True
-                            properties_unhandled = set(properties_fetched.keys()) - set(properties_moved_ip + properties_moved_uag)
-                            if len(properties_unhandled) > 0:
-                                for property_key in properties_unhandled:
-                                    if property_key not in properties_unhandled:
-                                        worker_properties_unhandled.append(property_key)
-                                        console.print(f"Worker {worker_id} property unhandled: [orange]{property_key}")
-                            snapshot['worker']['properties_fetched'] = properties_fetched_copy
-                            if len(sequence) > 4:
-                                for ip_current, ip_data_current in worker_ip_addresses[worker_id].items():
-                                    if snapshot['task']['batch_name'] in worker_ip_batches[worker_id][ip_current] and ip_current in sequence_key:
-                                        snapshot['ip']['info'][ip_current] = {}
-                                        snapshot['ip']['info'][ip_current][snapshot['task']['batch_name']] = worker_ip_addresses[worker_id][ip_current]['batches'][snapshot['task']['batch_name']]
-                                        snapshot['ip']['serialization'][ip_current] = ip_data[ip_current]
-                            else:
-                                for ip_current, ip_data_current in worker_ip_addresses[worker_id].items():
-                                    if snapshot['task']['batch_name'] in worker_ip_batches[worker_id][ip_current]:
-                                        snapshot['ip']['info'][ip_current] = {}
-                                        snapshot['ip']['info'][ip_current][snapshot['task']['batch_name']] = worker_ip_addresses[worker_id][ip_current]['batches'][snapshot['task']['batch_name']]
-                                        snapshot['ip']['serialization'][ip_current] = ip_data[ip_current]
-                            for ua_current, ua_data_current in worker_user_agents[worker_id].items():
-                                if snapshot['task']['batch_name'] in worker_user_agents_batches[worker_id][ua_current]:
-                                    snapshot['uag']['info'][ua_current] = {}
-                                    snapshot['uag']['info'][ua_current][snapshot['task']['batch_name']] = worker_user_agents[worker_id][ua_current]['batches'][snapshot['task']['batch_name']]
-                                    snapshot['uag']['serialization'][ua_current] = uag_data[ua_current]
-
-                        if log_data_source:
-                            paginator = dynamo_db.get_paginator('query')
-                            for page in paginator.paginate(
-                                TableName=log_data_source,
-                                KeyConditionExpression="worker = :worker",
-                                ExpressionAttributeValues={
-                                    ":worker": {'S': worker_id}
-                                }, Select='ALL_ATTRIBUTES'
-                            ):
-                                for item in page['Items']:
-                                    data = {
-                                        'worker': item['worker']['S'],
-                                        'task': item['task']['S'],
-                                        'batch': item['batch']['S'],
-                                        'unit_id': item['unitId']['S'] if 'unitId' in item else None,
-                                        'sequence': item['sequence']['S'].split("_")[1],
-                                        'type': item['type']['S'],
-                                        'time_server': item['server_time']['N'],
-                                        'time_client': item['client_time']['N'],
-                                        'details': json.loads(item['details']['S']) if 'S' in item['details'] else None
-                                    }
-                                    snapshot['logs'].append(data)
-
-                        if task_key_found:
-                            worker_snapshot.append(snapshot)
-
-            with open(worker_snapshot_path, 'w', encoding='utf-8') as f:
-                json.dump(worker_snapshot, f, ensure_ascii=False, indent=4, separators=(',', ':'))
-
-        worker_counter += 1
+                        if user_agent in worker_user_agents_batches[worker_id]:
+                            worker_user_agents_batches[worker_id][user_agent].append(snapshot['task']['batch_name'])
+                        else:
+                            worker_user_agents_batches[worker_id][user_agent] = [snapshot['task']['batch_name']]
+                    for user_agent_current in worker_user_agents[worker_id]:
+                        if not worker_user_agents[worker_id][user_agent_current]['fetched']:
+                            fetch_uag_data(worker_id, user_agent_current, properties_fetched)
+                            worker_user_agents[worker_id][user_agent_current]['fetched'] = True
+
+                    ip_data, properties_moved_ip = fetch_ip_data(worker_id, ip_address, properties_fetched)
+                    uag_data, properties_moved_uag = fetch_uag_data(worker_id, user_agent, properties_fetched)
+                    worker_ip_addresses[worker_id][ip_address]['fetched'] = True
+                    worker_user_agents[worker_id][user_agent]['fetched'] = True
+                    properties_unhandled = set(properties_fetched.keys()) - set(properties_moved_ip + properties_moved_uag)
+                    if len(properties_unhandled) > 0:
+                        for property_key in properties_unhandled:
+                            if property_key not in properties_unhandled:
+                                worker_properties_unhandled.append(property_key)
+                                console.print(f"Worker {worker_id} property unhandled: [orange]{property_key}")
+                    snapshot['worker']['properties_fetched'] = properties_fetched_copy
+                    if len(sequence) > 4:
+                        for ip_current, ip_data_current in worker_ip_addresses[worker_id].items():
+                            if snapshot['task']['batch_name'] in worker_ip_batches[worker_id][ip_current] and ip_current in sequence_key:
+                                snapshot['ip']['info'][ip_current] = {}
+                                snapshot['ip']['info'][ip_current][snapshot['task']['batch_name']] = worker_ip_addresses[worker_id][ip_current]['batches'][snapshot['task']['batch_name']]
+                                snapshot['ip']['serialization'][ip_current] = ip_data[ip_current]
+                    else:
+                        for ip_current, ip_data_current in worker_ip_addresses[worker_id].items():
+                            if snapshot['task']['batch_name'] in worker_ip_batches[worker_id][ip_current]:
+                                snapshot['ip']['info'][ip_current] = {}
+                                snapshot['ip']['info'][ip_current][snapshot['task']['batch_name']] = worker_ip_addresses[worker_id][ip_current]['batches'][snapshot['task']['batch_name']]
+                                snapshot['ip']['serialization'][ip_current] = ip_data[ip_current]
+                    for ua_current, ua_data_current in worker_user_agents[worker_id].items():
+                        if snapshot['task']['batch_name'] in worker_user_agents_batches[worker_id][ua_current]:
+                            snapshot['uag']['info'][ua_current] = {}
+                            snapshot['uag']['info'][ua_current][snapshot['task']['batch_name']] = worker_user_agents[worker_id][ua_current]['batches'][snapshot['task']['batch_name']]
+                            snapshot['uag']['serialization'][ua_current] = uag_data[ua_current]
+
+                if log_data_source:
+                    for item in fetch_worker_items(log_data_source, 'worker', worker_id):
+                        data = {
+                            'worker': item['worker']['S'],
+                            'task': item['task']['S'],
+                            'batch': item['batch']['S'],
+                            'unit_id': item['unitId']['S'] if 'unitId' in item else None,
+                            'sequence': item['sequence']['S'].split("_")[1],
+                            'type': item['type']['S'],
+                            'time_server': item['server_time']['N'],
+                            'time_client': item['client_time']['N'],
+                            'details': json.loads(item['details']['S']) if 'S' in item['details'] else None
+                        }
+                        snapshot['logs'].append(data)
+
+                if task_key_found:
+                    worker_snapshot.append(snapshot)
+
+    worker_snapshot_path_temp = f"{worker_snapshot_path}.part"
+    with open(worker_snapshot_path_temp, 'w', encoding='utf-8') as f:
+        json.dump(worker_snapshot, f, ensure_ascii=False, indent=4, separators=(',', ':'))
+    os.replace(worker_snapshot_path_temp, worker_snapshot_path)
+
+    return True
+
+
+if enrichment_prefetch:
+
+    enrichment_ip_providers = []
+    if ip_info_token:
+        enrichment_ip_providers.append('ipinfo')
+    if ip_geolocation_api_key:
+        enrichment_ip_providers.extend([f"ipgeolocation_{endpoint}" for endpoint in ipgeolocation_endpoints])
+    if ip_api_api_key:
+        enrichment_ip_providers.append('ipapi')
+    enrichment_uag_providers = []
+    if user_stack_token:
+        enrichment_uag_providers.append('userstack')
+    if ip_geolocation_api_key:
+        enrichment_uag_providers.append('ipgeolocation_user_agent')
+
+    # Unique lookups still needed by workers without a snapshot, grouped by provider
+    enrichment_pending = {}
+    for worker_id in worker_identifiers:
+        if os.path.exists(f"result/{task_name}/Data/{worker_id}.json"):
+            continue
+        for worker_values, resources_suffix, providers in [
+            (worker_ip_addresses.get(worker_id, {}), 'ip', enrichment_ip_providers),
+            (worker_user_agents.get(worker_id, {}), 'uag', enrichment_uag_providers)
+        ]:
+            resources_file = f"{resources_path}{worker_id}_{resources_suffix}.json"
+            resources_data = read_json(resources_file) if os.path.exists(resources_file) else {}
+            for value in worker_values:
+                if value in resources_data:
+                    continue
+                for provider in providers:
+                    pending = enrichment_pending.setdefault(provider, set())
+                    if value not in pending and enrichment_cache_get(enrichment_cache, value, provider, enrichment_cache_ttl) is None:
+                        pending.add(value)
+    enrichment_pending = {provider: sorted(values) for provider, values in enrichment_pending.items() if len(values) > 0}
+
+    if len(enrichment_pending) > 0:
+
+        console.print(f"Prefetching enrichment lookups: {', '.join([f'{provider} ([cyan]{len(values)}[/cyan])' for provider, values in enrichment_pending.items()])}")
+
+        start = time_mod()
+        # Longest pause honoured when a provider answers with Retry-After
+        RETRY_AFTER_MAX = 300
+
+
+        async def prefetch_enrichment_data():
+            # Providers sharing a host share the same concurrency and rate budget
+            hosts_state = {}
+
+            def get_host_state(provider):
+                host = provider.split('_')[0]
+                if host not in hosts_state:
+                    hosts_state[host] = {
+                        'semaphore': asyncio.Semaphore(enrichment_concurrency),
+                        'lock': asyncio.Lock(),
+                        'next_slot': 0.0
+                    }
+                return hosts_state[host]
+
+            async def wait_rate_slot(host_state):
+                if enrichment_rate_limit <= 0:
+                    return
+                async with host_state['lock']:
+                    now = time_mod()
+                    delay = host_state['next_slot'] - now
+                    host_state['next_slot'] = max(now, host_state['next_slot']) + 1 / enrichment_rate_limit
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            def build_request(provider, value):
+                if provider == 'userstack':
+                    return "http://api.userstack.com/detect", {'access_key': user_stack_token, 'ua': value}, None
+                if provider == 'ipgeolocation_user_agent':
+                    return f"https://api.ipgeolocation.io/user-agent?apiKey={ip_geolocation_api_key}", None, {'User-Agent': value}
+                if provider == 'ipapi':
+                    return f"http://api.ipapi.com/{value}?access_key={ip_api_api_key}", None, None
+                return build_ipgeolocation_url(provider.replace('ipgeolocation_', ''), value), None, None
+
+            def process_response(provider, value, status_code, text):
+                if provider == 'userstack':
+                    return process_userstack_data(json.loads(text))
+                if provider == 'ipgeolocation_user_agent':
+                    return process_ipgeolocation_uag_data(status_code, text, json.loads(text) if status_code == 200 else None)
+                if provider == 'ipapi':
+                    return process_ipapi_data(json.loads(text))
+                return process_ipgeolocation_data(provider.replace('ipgeolocation_', ''), value, status_code, text, json.loads(text) if status_code == 200 else None)
+
+            async def request(session, host_state, method, url, params=None, headers=None, data=None):
+                # Throttled and failed requests are retried, honouring Retry-After when the provider sends one
+                for attempt in range(enrichment_retries + 1):
+                    retry_after = None
+                    async with host_state['semaphore']:
+                        await wait_rate_slot(host_state)
+                        try:
+                            async with session.request(method, url, params=params, headers=headers, data=data, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                                text = await resp.text()
+                                if resp.status != 429 and resp.status < 500:
+                                    return resp.status, text
+                                retry_after = parse_retry_after(resp.headers.get('Retry-After'))
+                        except (asyncio.TimeoutError, aiohttp.ClientError):
+                            pass
+                    if attempt < enrichment_retries:
+                        await asyncio.sleep(min(retry_after, RETRY_AFTER_MAX) if retry_after is not None else 2 ** attempt)
+                return None
+
+            async def fetch(session, provider, value):
+                url, params, headers = build_request(provider, value)
+                response = await request(session, get_host_state(provider), 'GET', url, params=params, headers=headers)
+                if response is None:
+                    return False
+                status_code, text = response
+                enrichment_cache_set(enrichment_cache, value, provider, process_response(provider, value, status_code, text))
+                return True
+
+            async def fetch_ipinfo(session, values):
+                # The batch endpoint is called directly, the SDK handler only provides the country tables its details are formatted with
+                host_state = get_host_state('ipinfo')
+                handler = ipinfo.getHandler(ip_info_token)
+                headers = {**ipinfo.handler_utils.get_headers(ip_info_token, None), 'content-type': 'application/json'}
+                fetched = 0
+                # The batch endpoint accepts up to 1000 addresses per request
+                for index in range(0, len(values), 1000):
+                    chunk = values[index:index + 1000]
+                    response = await request(session, host_state, 'POST', "https://ipinfo.io/batch", headers=headers, data=json.dumps(chunk))
+                    details_batch = None
+                    if response is not None and response[0] == 200:
+                        try:
+                            details_batch = json.loads(response[1])
+                        except ValueError:
+                            pass
+                    if not isinstance(details_batch, dict):
+                        reason = f"status code {response[0]}" if response is not None else "no answer"
+                        console.print(f"[yellow]IPInfo batch of addresses {index} to {index + len(chunk) - 1} failed ({reason}), they will be fetched one by one")
+                        continue
+                    for ip_address, details in details_batch.items():
+                        if isinstance(details, dict):
+                            ipinfo.handler_utils.format_details(details, handler.countries, handler.eu_countries, handler.countries_flags, handler.countries_currencies, handler.continents)
+                            enrichment_cache_set(enrichment_cache, ip_address, 'ipinfo', process_ipinfo_data(details))
+                            fetched += 1
+                return fetched == len(values)
+
+            async with aiohttp.ClientSession() as session:
+                tasks = []
+                for provider, values in enrichment_pending.items():
+                    if provider == 'ipinfo':
+                        tasks.append(asyncio.create_task(fetch_ipinfo(session, values)))
+                    else:
+                        for value in values:
+                            tasks.append(asyncio.create_task(fetch(session, provider, value)))
+                failed = 0
+                for request_current in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
+                    try:
+                        if not await request_current:
+                            failed += 1
+                    except ValueError:
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+                        raise
+                return failed
+
+
+        try:
+            enrichment_failed = asyncio.run(prefetch_enrichment_data())
+        except ValueError as error:
+            console.print(f"[red]{error}")
+            sys.exit(1)
+        if enrichment_failed > 0:
+            console.print(f"Enrichment lookups not prefetched: [yellow]{enrichment_failed}[/yellow], they will be fetched while assembling snapshots")
+        console.print(f"Enrichment lookups prefetched in [cyan]{round(time_mod() - start, 2)}[/cyan] seconds")
+        enrichment_cache_evict(enrichment_cache, enrichment_cache_size)
+
+if snapshot_scan:
+
+    workers_pending = set(worker_id for worker_id in worker_identifiers if not os.path.exists(f"result/{task_name}/Data/{worker_id}.json"))
+
+    if len(workers_pending) > 0:
+
+        console.print(f"Scanning Data and Logger tables using [cyan]{snapshot_scan_segments}[/cyan] segments for [cyan]{len(workers_pending)}[/cyan] workers")
+
+        start = time_mod()
+        # Each table is read once instead of being queried once per worker
+        for table_name in task_data_tables:
+            worker_items_scanned[table_name] = scan_worker_items(table_name, 'identifier', workers_pending)
+            console.print(f"Table [cyan]{table_name}[/cyan] scanned, items found for [green]{len(worker_items_scanned[table_name])}[/green] workers")
+        for table_name in task_log_tables:
+            worker_items_scanned[table_name] = scan_worker_items(table_name, 'worker', workers_pending)
+            console.print(f"Table [cyan]{table_name}[/cyan] scanned, items found for [green]{len(worker_items_scanned[table_name])}[/green] workers")
+        console.print(f"Tables scanned in [cyan]{round(time_mod() - start, 2)}[/cyan] seconds")
+
+with console.status(f"Workers Amount: {len(worker_identifiers)}", spinner="aesthetic") as status:
+    status.start()
+
+    if snapshot_threads > 1:
+        console.print(f"Downloading worker snapshots using [cyan]{snapshot_threads}[/cyan] threads")
+        with ThreadPoolExecutor(max_workers=snapshot_threads) as executor:
+            futures = [executor.submit(fetch_worker_snapshot, worker_id) for worker_id in worker_identifiers]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                future.result()
+                worker_counter += 1
+                status.update(f"Downloading worker data, Total: {worker_counter}/{len(worker_identifiers)}")
+    else:
+        for worker_id in tqdm(worker_identifiers):
+            status.update(f"Downloading worker data, Identifier: {worker_id}, Total: {worker_counter}/{len(worker_identifiers)}")
+            fetch_worker_snapshot(worker_id)
+            worker_counter += 1
 
     if worker_counter > 0:
         console.print(f"Data fetching for {worker_counter} workers [green]completed")
 
+enrichment_cache_evict(enrichment_cache, enrichment_cache_size)
+enrichment_cache.close()
+
+worker_items_scanned.clear()
+
 if len(worker_properties_unhandled) > 0:
-    console.print(f"Worker properties not handled: {len(properties_unhandled)}")
-    for property_key in properties_unhandled:
+    console.print(f"Worker properties not handled: {len(worker_properties_unhandled)}")
+    for property_key in worker_properties_unhandled:
         console.print(f"Property name: [orange]{property_key}")
 
+@lru_cache(maxsize=snapshot_cache_size if snapshot_cache_size > 0 else None)
+def load_worker_snapshots(worker_snapshots_path):
+    # Keyed on (worker_id, task_name, batch_name, unit_id); the first matching snapshot wins, as with a linear scan
+    snapshots = read_json(worker_snapshots_path)
+    snapshots_index = {}
+    snapshots_index_with_data = {}
+    for snapshot in snapshots:
+        try:
+            snapshot_key = (snapshot['worker']['identifier'], snapshot['task']['task_name'], snapshot['task']['batch_name'], snapshot['task']['unit_id'])
+        except KeyError:
+            console.print(f"Snapshot [yellow]{snapshot.get('sequence_key')}[/yellow] lacks task identifiers, skipping it in the index")
+            continue
+        snapshots_index.setdefault(snapshot_key, snapshot)
+        if int(snapshot['data_items']) > 0:
+            snapshots_index_with_data.setdefault(snapshot_key, snapshot)
+    return snapshots, snapshots_index, snapshots_index_with_data
+
+
 with console.status(f"Checking worker snapshots download", spinner="aesthetic") as status:
     status.start()
-    workers_snapshots_paths = glob(f"{data_path}/*")
+    workers_snapshots_paths = glob(f"{data_path}/*.json")
     for worker_snapshots_path in workers_snapshots_paths:
-        worker_snapshots = read_json(worker_snapshots_path)
+        worker_snapshots, _, _ = load_worker_snapshots(os.path.abspath(worker_snapshots_path))
         for worker_snapshot in worker_snapshots:
             if worker_snapshot['data_items'] > 0:
                 worker_snapshots_with_data_counter = worker_snapshots_with_data_counter + 1
@@ -1018,27 +1360,11 @@ console.print(f"Workers Snapshots serialized at path: [cyan on white]{data_path}
 
 def find_snapshot_for_record(acl_record, include_empty=False):
     worker_snapshots_path = f"result/{acl_record['task_name']}/Data/{acl_record['worker_id']}.json"
-    snapshots = read_json(worker_snapshots_path)
-    for snapshot in snapshots:
-        if not include_empty:
-            if int(snapshot['data_items']) > 0:
-                if snapshot['worker']['identifier'] == acl_record['worker_id'] and \
-                    snapshot['task']['task_name'] == acl_record['task_name'] and \
-                    snapshot['task']['batch_name'] == acl_record['batch_name'] and \
-                    snapshot['task']['unit_id'] == acl_record['unit_id']:
-                    return snapshot
-
-        else:
-            try:
-                if snapshot['worker']['identifier'] == acl_record['worker_id'] and \
-                    snapshot['task']['task_name'] == acl_record['task_name'] and \
-                    snapshot['task']['batch_name'] == acl_record['batch_name'] and \
-                    snapshot['task']['unit_id'] == acl_record['unit_id']:
-                    return snapshot
-            except KeyError:
-                pp.pprint(worker_id)
-                ##pp.pprint(acl_record)
-                assert False
+    _, snapshots_index, snapshots_index_with_data = load_worker_snapshots(os.path.abspath(worker_snapshots_path))
+    snapshot_key = (acl_record['worker_id'], acl_record['task_name'], acl_record['batch_name'], acl_record['unit_id'])
+    if include_empty:
+        return snapshots_index.get(snapshot_key)
+    return snapshots_index_with_data.get(snapshot_key)
 
 
 def check_worker_paid(snapshot):
@@ -1051,6 +1377,29 @@ def check_worker_paid(snapshot):
     return paid
 
 
+column_names_cache = {}
+
+
+def load_col_names_cached(load_col_names, *config):
+    # Snapshots of the same batch share their configuration, so each distinct configuration is scanned only once
+    cache_key = (load_col_names.__name__, hashlib.sha1(json.dumps(config, default=str).encode('utf-8')).hexdigest())
+    if cache_key not in column_names_cache:
+        column_names_cache[cache_key] = load_col_names(*config)
+    return column_names_cache[cache_key]
+
+
+def load_union_col_names(df_acl, load_col_names, load_config):
+    # Union of the columns needed by every snapshot, in the order an incremental build would have added them
+    columns = {}
+    for acl_record in df_acl[['worker_id', 'task_name', 'batch_name', 'unit_id']].to_dict('records'):
+        worker_snapshot = find_snapshot_for_record(acl_record, include_empty=True)
+        if worker_snapshot is not None:
+            for column in load_col_names_cached(load_col_names, *load_config(worker_snapshot)):
+                if column not in columns:
+                    columns[column] = None
+    return list(columns)
+
+
 console.rule(f"{step_index} - Fetching Workers ACL")
 step_index = step_index + 1
 
@@ -1168,7 +1517,7 @@ if not os.path.exists(df_acl_path):
                         ]
 
                         worker_snapshot_path = f"result/{task_name}/Data/{worker_id}.json"
-                        worker_snapshots = read_json(worker_snapshot_path)
+                        worker_snapshots, _, _ = load_worker_snapshots(os.path.abspath(worker_snapshot_path))
                         if len(worker_snapshots) > 0:
                             for worker_snapshot in worker_snapshots:
                                 if worker_snapshot['sequence_key'] in sequence_keys:
@@ -1206,12 +1555,12 @@ if not os.path.exists(df_acl_path):
             console.print(f"Dropping unused columns: [yellow]{', '.join(empty_cols)}")
         df_acl.drop(empty_cols, axis=1, inplace=True)
         df_acl.sort_values(by='time_arrival_parsed', inplace=True)
-        df_acl.to_csv(df_acl_path, index=False)
+        save_dataframe(df_acl, df_acl_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_acl.shape}")
         console.print(f"Workers info dataframe serialized at path: [cyan on white]{df_acl_path}")
 
 else:
-    df_acl = pd.read_csv(df_acl_path)
+    df_acl = load_dataframe(df_acl_path)
     console.print(f"Workers ACL [yellow]already detected[/yellow], skipping download")
 
 platforms = np.unique(df_acl['platform'].astype(str).values)
@@ -1220,18 +1569,14 @@ console.rule(f"{step_index} - Checking Missing Units")
 step_index = step_index + 1
 
 hits = read_json(f"{task_config_folder}{batch_name}/{filename_hits_config}")
-units = []
-for hit in tqdm(hits):
-    hit_completed = False
-    for index, acl_record in df_acl.iterrows():
-        if hit['unit_id'] == acl_record['unit_id'] and acl_record['paid'] == True:
-            hit_completed = True
-    if not hit_completed:
-        units.append(hit['unit_id'])
-console.print(f"There are [cyan on white]{len(units)}/{len(hits)}[/cyan on white] units not yet evaluated")
-if units:
-    sorted_units = sorted(units, key=lambda u: int(re.search(r'\d+', u).group()))
-    console.print(Columns(sorted_units, equal=True, expand=True))
+units_status = find_units_status(df_acl, task_config_folder, task_batch_names, filename_hits_config)
+for batch_name_current, batch_units_status in units_status.items():
+    units = batch_units_status['missing']
+    units_amount = len(batch_units_status['completed']) + len(units)
+    console.print(f"Batch [green]{batch_name_current}[/green]: there are [cyan on white]{len(units)}/{units_amount}[/cyan on white] units not yet evaluated")
+    if units:
+        sorted_units = sorted(units, key=lambda u: int(re.search(r'\d+', u).group()))
+        console.print(Columns(sorted_units, equal=True, expand=True))
 
 if 'mturk' in platforms:
 
@@ -1320,12 +1665,12 @@ if 'mturk' in platforms:
                             hit_counter = hit_counter + 1
 
                         token_counter += 1
-                        hit_df.to_csv(df_mturk_data_path, index=False)
+                        save_dataframe(hit_df, df_mturk_data_path, dataframe_compression)
                     except KeyError:
                         console.print(f"Found tokens: {token_counter}, HITs: {hit_counter}")
                         break
             else:
-                hit_df = pd.read_csv(df_mturk_data_path)
+                hit_df = load_dataframe(df_mturk_data_path)
 
         console.print(f"MTurk HITs data available at path: [cyan on white]{df_mturk_data_path}")
 
@@ -1554,7 +1899,7 @@ if 'prolific' in platforms:
         console.print(f"Dataframe shape: {df_prolific_study_data.shape}")
         if df_prolific_study_data.shape[0] > 0:
             df_prolific_study_data.dropna(axis=1, how='all', inplace=True)
-            df_prolific_study_data.to_csv(df_prolific_study_data_path, index=False)
+            save_dataframe(df_prolific_study_data, df_prolific_study_data_path, dataframe_compression)
             console.print(f"Prolific study dataframe serialized at path: [cyan on black]{df_prolific_study_data_path}")
         else:
             console.print(f"Dataframe study shape: {df_prolific_study_data.shape}")
@@ -1562,7 +1907,7 @@ if 'prolific' in platforms:
 
     else:
 
-        df_prolific_study_data = pd.read_csv(df_prolific_study_data_path)
+        df_prolific_study_data = load_dataframe(df_prolific_study_data_path)
         console.print(f"Prolific dataframe [yellow]already detected[/yellow], skipping creation")
         console.print(f"Serialized at path: [cyan on black]{df_prolific_study_data_path}")
 
@@ -1651,71 +1996,171 @@ if 'prolific' in platforms:
 
         if df_prolific_demo_data.shape[0] > 0:
             df_prolific_demo_data.dropna(axis=1, how='all', inplace=True)
-            df_prolific_demo_data.to_csv(df_prolific_demographic_data_path, index=False)
+            save_dataframe(df_prolific_demo_data, df_prolific_demographic_data_path, dataframe_compression)
             console.print(f"Prolific demographic dataframe serialized at path: [cyan on black]{df_prolific_demographic_data_path}")
         else:
             console.print(f"Dataframe shape: {df_prolific_demo_data.shape}")
             console.print(f"Prolific demographic dataframe [yellow]empty[/yellow], dataframe not serialized.")
     else:
-        df_prolific_demo_data = pd.read_csv(df_prolific_demographic_data_path)
+        df_prolific_demo_data = load_dataframe(df_prolific_demographic_data_path)
         console.print(f"Prolific demographic dataframe [yellow]already detected[/yellow], skipping creation")
         console.print(f"Serialized at path: [cyan on black]{df_prolific_demographic_data_path}")
 
-console.rule(f"{step_index} - Building [cyan on white]workers_ip_addresses[/cyan on white] Dataframe")
-step_index = step_index + 1
-
-if not os.path.exists(df_ip_path):
-
-    df_ip = pd.DataFrame()
-
-    for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
-
-        worker_id = acl_record['worker_id']
-        sequence_key = f"{acl_record['worker_id']}-{acl_record['ip_address']}-{acl_record['unit_id']}"
+def iter_acl_snapshots(df_acl):
+    # Records are visited in ACL arrival order, which decides the order in which columns are discovered
+    for acl_record in df_acl[['worker_id', 'task_name', 'batch_name', 'unit_id']].to_dict('records'):
         worker_snapshot = find_snapshot_for_record(acl_record, include_empty=True)
-
         if worker_snapshot is not None:
+            yield acl_record['worker_id'], worker_snapshot
+
+
+def iter_ip_address_records(df_acl):
+    for worker_id, worker_snapshot in iter_acl_snapshots(df_acl):
+        worker_paid = check_worker_paid(worker_snapshot)
+        task = worker_snapshot['task']
+        ip_data = worker_snapshot['ip']
+        ip_info = ip_data['info']
+        ip_serialization = ip_data['serialization']
+        for ip_address, ip_info_details in ip_info.items():
+            for ip_batch, batch_data in ip_info_details.items():
+                row = {
+                    'worker_id': worker_id,
+                    'paid': worker_paid,
+                    'task_name': task['task_name'],
+                    'batch_name': ip_batch,
+                    'unit_id': task['unit_id'],
+                    'ip_address': ip_address,
+                    'time_submit': batch_data['time_submit'],
+                    'time_submit_parsed': batch_data['time_submit_parsed'],
+                }
+                ip_properties = ip_serialization[ip_address]
+                for property, value in ip_properties.items():
+                    if property == 'location_languages':
+                        for index_lang, location_language_data in enumerate(value):
+                            for lang_property, lang_value in location_language_data.items():
+                                row[f"{lang_property}_{index_lang}"] = lang_value
+                    else:
+                        row[property] = value
+                yield row
+
+
+def iter_user_agent_records(df_acl):
+    for worker_id, worker_snapshot in iter_acl_snapshots(df_acl):
+        worker_paid = check_worker_paid(worker_snapshot)
+        task = worker_snapshot['task']
+        ua_data = worker_snapshot['uag']
+        ua_info = ua_data['info']
+        ua_serialization = ua_data['serialization']
+        for user_agent, user_agent_details in ua_info.items():
+            for ua_batch, batch_data in user_agent_details.items():
+                row = {
+                    'worker_id': worker_id,
+                    'paid': worker_paid,
+                    'task_name': task['task_name'] if 'task_name' in task else task['task_id'],
+                    'batch_name': ua_batch,
+                    'unit_id': task['unit_id'],
+                    'user_agent': user_agent,
+                    'time_submit': batch_data['time_submit'],
+                    'time_submit_parsed': batch_data['time_submit_parsed'],
+                }
+                ua_properties = ua_serialization[user_agent]
+                for property, value in ua_properties.items():
+                    row[property] = value
+                yield row
+
+
+def records_sort_key(sort_columns):
+    # Missing values sort last, as they do with DataFrame.sort_values
+    def sort_key(row):
+        key = []
+        for column in sort_columns:
+            value = row.get(column)
+            missing = value is None or value != value
+            key.append((missing, '' if missing else value))
+        return tuple(key)
+    return sort_key
+
+
+def iter_spilled_rows(spill_path):
+    with open(spill_path, 'rb') as spill_file:
+        while True:
+            try:
+                yield pickle.load(spill_file)
+            except EOFError:
+                return
+
+
+def serialize_records_in_chunks(records_factory, path, sort_columns):
+    # Snapshots are read once: rows are spilled to disk in sorted runs while the schema is discovered,
+    # then the runs are merged and written with the final schema
+    sort_key = records_sort_key(sort_columns)
+    columns = {}
+    spill_paths = []
+    rows_chunk = []
+
+    def spill_chunk():
+        spill_path = f"{path}.part{len(spill_paths)}"
+        with open(spill_path, 'wb') as spill_file:
+            for row in sorted(rows_chunk, key=sort_key):
+                pickle.dump(row, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+        spill_paths.append(spill_path)
+
+    for row in tqdm(records_factory(), desc="Reading snapshots"):
+        for column, value in row.items():
+            if column not in columns:
+                columns[column] = set()
+            columns[column].add(type(value))
+        rows_chunk.append(row)
+        if len(rows_chunk) >= dataframe_chunk_size:
+            spill_chunk()
+            rows_chunk = []
+    if len(rows_chunk) > 0:
+        spill_chunk()
+        rows_chunk = []
+
+    schema = pa.schema([(column, arrow_type_for(value_types)) for column, value_types in columns.items()])
+    columns = list(columns)
+    rows_written = 0
+    if len(columns) == 0:
+        return rows_written, columns
+
+    path_temp = f"{path}.part"
+    parquet_writer = pq.ParquetWriter(path_temp, schema, compression=dataframe_compression) if path.endswith('.parquet') else None
+
+    def flush_chunk():
+        df_chunk = pd.DataFrame(rows_chunk, columns=columns)
+        if parquet_writer is not None:
+            parquet_writer.write_table(pa.Table.from_pandas(arrow_normalize(df_chunk, schema), schema=schema, preserve_index=False))
+        else:
+            df_chunk.to_csv(path_temp, index=False, mode='w' if rows_written == 0 else 'a', header=rows_written == 0)
+        return rows_written + len(rows_chunk)
+
+    for row in tqdm(heapq.merge(*[iter_spilled_rows(spill_path) for spill_path in spill_paths], key=sort_key), desc="Serializing rows"):
+        rows_chunk.append(row)
+        if len(rows_chunk) >= dataframe_chunk_size:
+            rows_written = flush_chunk()
+            rows_chunk = []
+    if len(rows_chunk) > 0:
+        rows_written = flush_chunk()
+    if parquet_writer is not None:
+        parquet_writer.close()
+    for spill_path in spill_paths:
+        os.remove(spill_path)
+    os.replace(path_temp, path)
+    return rows_written, columns
 
-            worker_paid = check_worker_paid(worker_snapshot)
-            task = worker_snapshot['task']
-            checks = worker_snapshot['checks']
-            ip_data = worker_snapshot['ip']
-
-            ip_info = ip_data['info']
-            ip_serialization = ip_data['serialization']
-
-            for ip_address, ip_info_details in ip_info.items():
 
-                for ip_batch, batch_data in ip_info_details.items():
+console.rule(f"{step_index} - Building [cyan on white]workers_ip_addresses[/cyan on white] Dataframe")
+step_index = step_index + 1
 
-                    row = {
-                        'worker_id': worker_id,
-                        'paid': worker_paid,
-                        'task_name': task['task_name'],
-                        'batch_name': ip_batch,
-                        'unit_id': task['unit_id'],
-                        'ip_address': ip_address,
-                        'time_submit': batch_data['time_submit'],
-                        'time_submit_parsed': batch_data['time_submit_parsed'],
-                    }
+if not os.path.exists(df_ip_path):
 
-                    ip_properties = ip_serialization[ip_address]
-                    for property, value in ip_properties.items():
-                        if property == 'location_languages':
-                            for index_lang, location_language_data in enumerate(value):
-                                for lang_property, lang_value in location_language_data.items():
-                                    row[f"{lang_property}_{index_lang}"] = lang_value
-                        else:
-                            row[property] = value
-                    df_ip = pd.concat([df_ip, pd.DataFrame([row])])
+    rows_written, columns = serialize_records_in_chunks(lambda: iter_ip_address_records(df_acl), df_ip_path, ['worker_id', 'batch_name', 'time_submit_parsed'])
 
-    if len(df_ip) > 0:
-        df_ip.sort_values(by=['worker_id', 'batch_name', 'time_submit_parsed'], inplace=True)
-        df_ip.to_csv(df_ip_path, index=False)
-        console.print(f"Dataframe shape: {df_ip.shape}")
+    if rows_written > 0:
+        console.print(f"Dataframe shape: {(rows_written, len(columns))}")
         console.print(f"Workers IP addresses dataframe serialized at path: [cyan on white]{df_ip_path}")
 else:
-    df_ip = pd.read_csv(df_ip_path)
     console.print(f"Workers IP addresses dataframe [yellow]already detected[/yellow], skipping creation")
     console.print(f"Serialized at path: [cyan on white]{df_ip_path}")
 
@@ -1724,52 +2169,14 @@ step_index = step_index + 1
 
 if not os.path.exists(df_uag_path):
 
-    df_ua = pd.DataFrame()
-
-    for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
-
-        worker_id = acl_record['worker_id']
-        worker_snapshot = find_snapshot_for_record(acl_record, include_empty=True)
-
-        if worker_snapshot is not None:
-
-            worker_paid = check_worker_paid(worker_snapshot)
-            task = worker_snapshot['task']
-            checks = worker_snapshot['checks']
-            ua_data = worker_snapshot['uag']
-
-            ua_info = ua_data['info']
-            ua_serialization = ua_data['serialization']
+    rows_written, columns = serialize_records_in_chunks(lambda: iter_user_agent_records(df_acl), df_uag_path, ['worker_id', 'batch_name', 'time_submit_parsed'])
 
-            for user_agent, user_agent_details in ua_info.items():
-
-                for ua_batch, batch_data in user_agent_details.items():
-
-                    row = {
-                        'worker_id': worker_id,
-                        'paid': worker_paid,
-                        'task_name': task['task_name'] if 'task_name' in task else task['task_id'],
-                        'batch_name': ua_batch,
-                        'unit_id': task['unit_id'],
-                        'user_agent': user_agent,
-                        'time_submit': batch_data['time_submit'],
-                        'time_submit_parsed': batch_data['time_submit_parsed'],
-                    }
-
-                    ua_properties = ua_serialization[user_agent]
-                    for property, value in ua_properties.items():
-                        row[property] = value
-                    df_ua = pd.concat([df_ua, pd.DataFrame([row])], ignore_index=True)
-
-    if len(df_ua) > 0:
-        df_ua.sort_values(by=['worker_id', 'batch_name', 'time_submit_parsed'], inplace=True)
-        df_ua.to_csv(df_uag_path, index=False)
-        console.print(f"Dataframe shape: {df_ua.shape}")
+    if rows_written > 0:
+        console.print(f"Dataframe shape: {(rows_written, len(columns))}")
         console.print(f"Workers user agents dataframe serialized at path: [cyan on white]{df_uag_path}")
 else:
-    df_ua = pd.read_csv(df_uag_path)
     console.print(f"Workers user agents dataframe [yellow]already detected[/yellow], skipping creation")
-    console.print(f"Serialized at path: [cyan on white]{df_ip_path}")
+    console.print(f"Serialized at path: [cyan on white]{df_uag_path}")
 
 console.rule(f"{step_index} - Building [cyan on white]workers_comments[/cyan on white] dataframe")
 step_index = step_index + 1
@@ -1840,7 +2247,7 @@ if not os.path.exists(df_comm_path):
         df_comm["paid"] = df_comm["paid"].replace({0.0: False, 1.0: True})
         df_comm["paid"] = df_comm["paid"].astype(bool)
         df_comm.sort_values(by='time_submit_parsed', inplace=True)
-        df_comm.to_csv(df_comm_path, index=False)
+        save_dataframe(df_comm, df_comm_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_comm.shape}")
         console.print(f"Workers comments dataframe serialized at path: [cyan on white]{df_comm_path}")
     else:
@@ -1980,6 +2387,8 @@ def parse_answers(row, questionnaire, question, answers):
 if not os.path.exists(df_quest_path):
 
     df_quest = pd.DataFrame()
+    for column in load_union_col_names(df_acl, load_quest_col_names, lambda snapshot: (snapshot['questionnaires'],)):
+        df_quest[column] = np.nan
     questionnaires_backup = None
 
     for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
@@ -2001,11 +2410,7 @@ if not os.path.exists(df_quest_path):
             batch_name = task['batch_name']
             unit_id = task['unit_id']
 
-            column_names = load_quest_col_names(questionnaires)
-
-            for column in column_names:
-                if column not in df_quest:
-                    df_quest[column] = np.nan
+            column_names = load_col_names_cached(load_quest_col_names, questionnaires)
 
             if len(questionnaires_answers) > 0:
 
@@ -2024,7 +2429,7 @@ if not os.path.exists(df_quest_path):
                         questionnaire = questionnaires[questionnaire_data['serialization']['info']['index']]
                     except KeyError:
                         # Branch triggered when the original 'data' payload has been lost
-                        questionnaire = questionnaires_backup[questionnaire_data['serialization']['info']['index']]
+                        questionnaire = dict(questionnaires_backup[questionnaire_data['serialization']['info']['index']])
                         questionnaire['questions'] = questionnaire_data['serialization']['questions']
                     questions = questionnaire_data['serialization']['questions']
                     current_answers = questionnaire_data['serialization']['answers']
@@ -2086,7 +2491,7 @@ if not os.path.exists(df_quest_path):
             df_quest["question_attribute_showDetail"] = df_quest["question_attribute_showDetail"].replace({0.0: False, 1.0: True})
             df_quest["question_attribute_showDetail"] = df_quest["question_attribute_showDetail"].astype(bool)
         df_quest.sort_values(by=['worker_id', 'time_submit_parsed'], inplace=True)
-        df_quest.to_csv(df_quest_path, index=False)
+        save_dataframe(df_quest, df_quest_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_quest.shape}")
         console.print(f"Workers questionnaire dataframe serialized at path: [cyan on white]{df_quest_path}")
     else:
@@ -2131,6 +2536,9 @@ def load_elem_col_names(documents):
 
 if not os.path.exists(df_docs_path):
 
+    for column in load_union_col_names(df_acl, load_elem_col_names, lambda snapshot: (snapshot['documents'],)):
+        df_docs[column] = np.nan
+
     for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
 
         worker_id = acl_record['worker_id']
@@ -2143,11 +2551,7 @@ if not os.path.exists(df_docs_path):
             task = worker_snapshot['task']
             documents = worker_snapshot['documents']
 
-            column_names = load_elem_col_names(documents)
-
-            for column in column_names:
-                if column not in df_docs:
-                    df_docs[column] = np.nan
+            column_names = load_col_names_cached(load_elem_col_names, documents)
 
             if len(documents) > 0:
 
@@ -2205,7 +2609,7 @@ if not os.path.exists(df_docs_path):
     if df_docs.shape[0] > 0:
         empty_cols = [col for col in df_docs.columns if df_docs[col].isnull().all()]
         df_docs.drop(empty_cols, axis=1, inplace=True)
-        df_docs.to_csv(df_docs_path, index=False)
+        save_dataframe(df_docs, df_docs_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_docs.shape}")
         console.print(f"Documents dataframe serialized at path: [cyan on white]{df_docs_path}")
     else:
@@ -2317,6 +2721,9 @@ def check_task_type(doc, typeslist):
 
 if not os.path.exists(df_data_path):
 
+    for column in load_union_col_names(df_acl, load_data_col_names, lambda snapshot: (snapshot['dimensions'], snapshot['task'].get('settings'))):
+        df_answ[column] = np.nan
+
     for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
 
         worker_id = acl_record['worker_id']
@@ -2336,11 +2743,7 @@ if not os.path.exists(df_data_path):
             if 'settings' in task.keys():
                 settings = task['settings']
 
-            column_names = load_data_col_names(dimensions, settings)
-
-            for column in column_names:
-                if column not in df_answ:
-                    df_answ[column] = np.nan
+            column_names = load_col_names_cached(load_data_col_names, dimensions, settings)
 
             if len(documents_answers) > 0:
 
@@ -2747,13 +3150,11 @@ if not os.path.exists(df_data_path):
                         row["time_start"] = np.nan
                     else:
                         row["time_start"] = round(document_data['serialization']['timestamps_start'][0], 2)
-                        row["time_start_parsed"] = find_date_string(datetime.fromtimestamp(float(row["time_start"]), timezone('GMT')).strftime('%c'))
 
                     if not document_data['serialization']['timestamps_end']:
                         row["time_end"] = np.nan
                     else:
                         row["time_end"] = round(document_data['serialization']['timestamps_end'][0], 2)
-                        row["time_end_parsed"] = find_date_string(datetime.fromtimestamp(float(row["time_end"]), timezone('GMT')).strftime('%c'))
 
                     if not document_data['serialization']['timestamps_elapsed']:
                         row["time_elapsed"] = np.nan
@@ -2764,6 +3165,10 @@ if not os.path.exists(df_data_path):
                         df_answ = pd.concat([df_answ, pd.DataFrame([row])], ignore_index=True)
 
     if df_answ.shape[0] > 0:
+        # Parsed times are derived from the raw epochs in a single pass once every row is in place
+        for time_column in ['time_start', 'time_end']:
+            time_parsed = find_date_series(df_answ[time_column], unit='s')
+            df_answ[f"{time_column}_parsed"] = time_parsed.where(df_answ[time_column].notna(), df_answ[f"{time_column}_parsed"])
         empty_cols = [
             col for col in df_answ.columns
             if df_answ[col].apply(lambda x: pd.isna(x) or x == []).all()
@@ -2783,7 +3188,7 @@ if not os.path.exists(df_data_path):
         df_answ["gold_checks"] = df_answ["gold_checks"].astype(bool)
         df_answ.sort_values(by=['worker_id', 'time_submit_parsed'], inplace=True)
         df_answ.drop_duplicates(inplace=True)
-        df_answ.to_csv(df_data_path, index=False)
+        save_dataframe(df_answ, df_data_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_answ.shape}")
         console.print(f"Workers data dataframe serialized at path: [cyan on white]{df_data_path}")
     else:
@@ -2846,6 +3251,9 @@ df_notes = pd.DataFrame()
 
 if not os.path.exists(df_notes_path):
 
+    for column in load_col_names_cached(load_notes_col_names):
+        df_notes[column] = np.nan
+
     for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
 
         worker_id = acl_record['worker_id']
@@ -2859,11 +3267,7 @@ if not os.path.exists(df_notes_path):
             documents = worker_snapshot['documents']
             documents_answers = worker_snapshot['documents_answers']
 
-            column_names = load_notes_col_names()
-
-            for column in column_names:
-                if column not in df_notes:
-                    df_notes[column] = np.nan
+            column_names = load_col_names_cached(load_notes_col_names)
 
             if len(documents_answers) > 0:
 
@@ -2942,7 +3346,7 @@ if not os.path.exists(df_notes_path):
         df_notes["note_text_right_length"] = df_notes["note_text_right_length"].astype(int)
         df_notes.drop_duplicates(inplace=True)
         df_notes.sort_values(by=['worker_id', 'time_submit_parsed'], inplace=True)
-        df_notes.to_csv(df_notes_path, index=False)
+        save_dataframe(df_notes, df_notes_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_notes.shape}")
         console.print(f"Workers data dataframe serialized at path: [cyan on white]{df_notes_path}")
     else:
@@ -2958,7 +3362,7 @@ console.rule(f"{step_index} - Building [cyan on white]workers_dimensions_selecti
 step_index = step_index + 1
 
 if os.path.exists(df_data_path):
-    df_data = pd.read_csv(df_data_path)
+    df_data = load_dataframe(df_data_path)
 
 df_dim_sel = pd.DataFrame(columns=[
     "worker_id",
@@ -3102,7 +3506,7 @@ if not os.path.exists(df_dim_path) and os.path.exists(df_data_path):
         df_dim_sel["try_current"] = df_dim_sel["try_current"].astype(int)
         df_dim_sel.drop_duplicates(inplace=True)
         df_dim_sel.sort_values(by=['worker_id', 'selection_timestamp_parsed'], inplace=True)
-        df_dim_sel.to_csv(df_dim_path, index=False)
+        save_dataframe(df_dim_sel, df_dim_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_dim_sel.shape}")
         console.print(f"Dimension analysis dataframe serialized at path: [cyan on white]{df_dim_path}")
     else:
@@ -3116,7 +3520,7 @@ console.rule(f"{step_index} - Building [cyan on white]workers_urls[/cyan on whit
 step_index = step_index + 1
 
 if os.path.exists(df_data_path):
-    df_data = pd.read_csv(df_data_path)
+    df_data = load_dataframe(df_data_path)
 
 df_urls = pd.DataFrame(columns=[
     "worker_id",
@@ -3150,7 +3554,7 @@ df_urls['try_last'] = df_urls['try_last'].astype(float)
 df_urls['try_current'] = df_urls['try_current'].astype(float)
 
 
-def parse_responses(df, worker_id, worker_paid, task, info, queries, responses_retrieved, responses_selected):
+def parse_responses(df, url_rows_retrieved, url_rows_selected, worker_id, worker_paid, task, info, queries, responses_retrieved, responses_selected):
     for index_current, responses_retrieved_document in enumerate(responses_retrieved):
         for index_current_sub, response_retrieved in enumerate(responses_retrieved_document["data"]):
 
@@ -3280,40 +3684,62 @@ def parse_responses(df, worker_id, worker_paid, task, info, queries, responses_r
                                 pass
 
                 row["index_selected"] = -1
-                row_check = df.loc[
-                    (df["worker_id"] == row["worker_id"]) &
-                    (df["try_last"] == task['try_last']) &
-                    (df["try_current"] == row["try_current"]) &
-                    (df["document_index"] == row["document_index"]) &
-                    (df["dimension_index"] == row["dimension_index"]) &
-                    (df["query_index"] == row["query_index"]) &
-                    (df["query_timestamp"] == row["query_timestamp"]) &
-                    (df["response_index"] == response_index_full)
-                    ]
-                if len(row_check) == 0:
-                    df.loc[len(df)] = row
+                row_key = (
+                    row["worker_id"],
+                    url_row_try_value(task['try_last']),
+                    url_row_try_value(row["try_current"]),
+                    row["document_index"],
+                    row["dimension_index"],
+                    row["query_index"],
+                    row["query_timestamp"],
+                    response_index_full
+                )
+                if not url_row_key_matchable(row_key) or row_key not in url_rows_retrieved:
+                    row_label = len(df)
+                    df.loc[row_label] = row
+                    if url_row_key_matchable(row_key):
+                        url_rows_retrieved[row_key] = row_label
+                    row_key_selected = (
+                        row["worker_id"],
+                        url_row_try_value(task['try_last']),
+                        url_row_try_value(row["try_current"]),
+                        row["document_index"],
+                        row["dimension_index"],
+                        row["query_index"],
+                        row["response_url"],
+                        row["response_name"],
+                        row["response_snippet"]
+                    )
+                    # The first stored row wins, as the lowest index matched by a boolean mask would
+                    if url_row_key_matchable(row_key_selected) and row_key_selected not in url_rows_selected:
+                        url_rows_selected[row_key_selected] = row_label
 
     for index_current, responses_selected_document in enumerate(responses_selected):
         for response_index, response_selected in enumerate(responses_selected_document["data"]):
-            row = df.loc[
-                (df["worker_id"] == worker_id) &
-                (df["try_last"] == task['try_last']) &
-                (df["try_current"] == info['try']) &
-                (df["document_index"] == response_selected["document"]) &
-                (df["dimension_index"] == response_selected["dimension"]) &
-                (df["query_index"] == response_selected["query"]) &
-                (df["response_url"] == response_selected["response"]['url']) &
-                (df["response_name"] == response_selected["response"]['name']) &
-                (df["response_snippet"] == response_selected["response"]['snippet'])
-                ]
-            if len(row.index.values) > 0:
-                df.at[row.index.values[0], 'index_selected'] = response_index
+            row_key_selected = (
+                worker_id,
+                url_row_try_value(task['try_last']),
+                url_row_try_value(info['try']),
+                response_selected["document"],
+                response_selected["dimension"],
+                response_selected["query"],
+                response_selected["response"]['url'],
+                response_selected["response"]['name'],
+                response_selected["response"]['snippet']
+            )
+            row_label = url_rows_selected.get(row_key_selected)
+            if row_label is not None:
+                df.at[row_label, 'index_selected'] = response_index
 
     return df
 
 
 if not os.path.exists(df_url_path):
 
+    # Row labels indexed by the tuples the retrieved and selected responses are matched on
+    url_rows_retrieved = {}
+    url_rows_selected = {}
+
     for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
 
         worker_id = acl_record['worker_id']
@@ -3337,7 +3763,7 @@ if not os.path.exists(df_url_path):
                     responses_retrieved = [document_data['serialization']['responses_retrieved']]
                     responses_selected = [document_data['serialization']['responses_selected']]
 
-                    df_urls = parse_responses(df_urls, worker_id, worker_paid, task, info, queries, responses_retrieved, responses_selected)
+                    df_urls = parse_responses(df_urls, url_rows_retrieved, url_rows_selected, worker_id, worker_paid, task, info, queries, responses_retrieved, responses_selected)
 
     df_urls.drop_duplicates(inplace=True)
 
@@ -3358,7 +3784,7 @@ if not os.path.exists(df_url_path):
         df_urls["try_current"] = df_urls["try_current"].astype(int)
         df_urls.drop_duplicates(inplace=True)
         df_urls.sort_values(by=['worker_id', 'query_timestamp_parsed'], inplace=True)
-        df_urls.to_csv(df_url_path, index=False)
+        save_dataframe(df_urls, df_url_path, dataframe_compression)
         console.print(f"Dataframe shape: {df_urls.shape}")
         console.print(f"Worker urls dataframe serialized at path: [cyan on white]{df_dim_path}")
     else:
@@ -3388,9 +3814,20 @@ column_names = [
 ]
 counter = 0
 
-if not os.path.exists(df_log_path):
 
-    for index, acl_record in tqdm(df_acl.iterrows(), total=df_acl.shape[0]):
+def add_log_column(log_columns, column):
+    if column not in log_columns:
+        log_columns[column] = None
+
+
+def append_log_row(log_rows, log_columns, row):
+    # Attributes without a registered column are dropped, as a `df.loc[len(df)] = row` append would do
+    log_rows.append({column: value for column, value in row.items() if column in log_columns})
+
+
+def build_worker_log_partial(acl_records):
+    # Every record of a worker ends up in the same partial, so a worker is never split across processes
+    for acl_record in acl_records:
 
         worker_id = acl_record['worker_id']
         worker_snapshot = find_snapshot_for_record(acl_record, include_empty=True)
@@ -3413,6 +3850,9 @@ if not os.path.exists(df_log_path):
                 (df_logs_part['unit_id'] == acl_record['unit_id'])
                 ]
 
+            log_columns = dict.fromkeys(df_logs_part.columns)
+            log_rows = []
+
             if len(logs) > 0 and existing_snapshot_records.shape[0] <= 0:
 
                 task_started = True
@@ -3428,174 +3868,250 @@ if not os.path.exists(df_log_path):
                         'task_started': task_started,
                         'sequence': data_log['sequence'],
                         'time_server': data_log['time_server'],
-                        'time_server_parsed': find_date_string(datetime.fromtimestamp(float(data_log['time_server']) / 1000, timezone('GMT')).strftime('%c')),
                         'time_client': data_log['time_client'],
-                        'time_client_parsed': find_date_string(datetime.fromtimestamp(float(data_log['time_client']) / 1000, timezone('GMT')).strftime('%c')),
                         'type': data_log['type'],
                     }
 
                     log_details = data_log['details']
 
                     if log_details:
-                        if data_log['type'] == 'keySequence':
-                            if 'log_section' not in df_logs_part.columns:
-                                df_logs_part['log_section'] = np.nan
-                            if 'log_key_sequence_index' not in df_logs_part.columns:
-                                df_logs_part['log_key_sequence_index'] = np.nan
-                            if 'log_key_sequence_timestamp' not in df_logs_part.columns:
-                                df_logs_part['log_key_sequence_timestamp'] = np.nan
-                            if 'log_key_sequence_key' not in df_logs_part.columns:
-                                df_logs_part['log_key_sequence_key'] = np.nan
-                            if 'log_sentence' not in df_logs_part.columns:
-                                df_logs_part['log_sentence'] = np.nan
-                            row['log_section'] = log_details['section']
-                            row['log_sentence'] = log_details['sentence']
-                            for index, key_sequence in enumerate(log_details['keySequence']):
-                                row['log_key_sequence_index'] = index
-                                row['log_key_sequence_timestamp'] = key_sequence['timeStamp']
-                                row['log_key_sequence_key'] = key_sequence['key'] if 'key' in key_sequence else np.nan
-                                df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'movements':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
-                                attribute_parsed = f"log_{attribute_parsed}"
-                                if type(value) != dict and type(value) != list:
-                                    if attribute_parsed not in df_logs_part.columns:
-                                        df_logs_part[attribute_parsed] = np.nan
-                                    row[attribute_parsed] = value
-                            for movement_data in log_details['points']:
-                                for attribute, value in movement_data.items():
-                                    attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
-                                    if type(value) == dict:
-                                        for attribute_sub, value_sub in value.items():
-                                            attribute_sub_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute_sub).lower()
-                                            attribute_sub_parsed = f"log_point_{attribute_parsed}_{attribute_sub_parsed}"
-                                            if attribute_sub_parsed not in df_logs_part.columns:
-                                                df_logs_part[attribute_sub_parsed] = np.nan
-                                            row[attribute_sub_parsed] = value_sub
-                                    else:
-                                        attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
-                                        attribute_parsed = f"log_point_{attribute_parsed}"
-                                        if attribute_parsed not in df_logs_part.columns:
-                                            df_logs_part[attribute_parsed] = np.nan
-                                        row[attribute_parsed] = value
-                                df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'click':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
-                                attribute_parsed = f"log_{attribute_parsed}"
-                                if type(value) != dict and type(value) != list:
-                                    if attribute_parsed not in df_logs_part.columns:
-                                        df_logs_part[attribute_parsed] = np.nan
-                                    row[attribute_parsed] = value
-                            for attribute, value in log_details['target'].items():
-                                attribute_parsed = re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()
-                                attribute_parsed = f"log_target_{attribute_parsed}"
-                                if attribute_parsed not in df_logs_part.columns:
-                                    df_logs_part[attribute_parsed] = np.nan
-                                row[attribute_parsed] = value
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'queryResults':
-                            if 'log_section' not in df_logs_part.columns:
-                                df_logs_part['log_section'] = np.nan
-                            if 'log_url_amount' not in df_logs_part.columns:
-                                df_logs_part['log_url_amount'] = np.nan
-                            row['log_section'] = log_details['section']
-                            if 'urlAmount' in log_details:
-                                row['log_url_amount'] = log_details['urlAmount']
-                            else:
-                                row['log_url_amount'] = len(log_details['urlArray'])
-                        elif data_log['type'] == 'copy' or data_log['type'] == 'cut':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
-                                if attribute_parsed not in df_logs_part.columns:
-                                    df_logs_part[attribute_parsed] = np.nan
-                                if attribute_parsed == 'target':
-                                    row[attribute_parsed] = value.replace("\n", '')
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'context':
-                            for detail_kind, detail_val in log_details.items():
-                                detail_kind_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', detail_kind).lower()}"
-                                if detail_kind_parsed not in df_logs_part.columns:
-                                    df_logs_part[detail_kind_parsed] = np.nan
-                                if type(detail_val) == str:
-                                    detail_val.replace('\n', '')
-                                row[detail_kind_parsed] = detail_val
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'init' or \
-                            data_log['type'] == 'window_blur' or \
-                            data_log['type'] == 'window_focus' or \
-                            data_log['type'] == 'resize' or \
-                            data_log['type'] == 'button' or \
-                            data_log['type'] == 'unload' or \
-                            data_log['type'] == 'shortcut' or \
-                            data_log['type'] == 'radioChange' or \
-                            data_log['type'] == 'scroll':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
-                                if attribute_parsed not in df_logs_part.columns:
-                                    df_logs_part[attribute_parsed] = np.nan
-                                row[attribute_parsed] = value
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'selection':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
-                                if attribute_parsed not in df_logs_part.columns:
-                                    df_logs_part[attribute_parsed] = np.nan
-                                if attribute_parsed == 'selected':
-                                    row[attribute_parsed] = value.replace("\n", '')
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'paste' or data_log['type'] == 'text':
-                            for attribute, value in log_details.items():
-                                attribute_parsed = f"log_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
-                                if attribute_parsed not in df_logs_part.columns:
-                                    df_logs_part[attribute_parsed] = np.nan
-                                if attribute_parsed == 'text':
-                                    row[attribute_parsed] = value.replace("\n", '')
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'query':
-                            if 'log_section' not in df_logs_part.columns:
-                                df_logs_part['log_section'] = np.nan
-                            if 'log_query' not in df_logs_part.columns:
-                                df_logs_part['log_query'] = np.nan
-                            row['log_section'] = log_details['section']
-                            row['log_query_text'] = log_details['query']['text']
-                            row['log_query_text_encoded'] = log_details['query']['encoded']
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        elif data_log['type'] == 'linkVisited':
-                            if 'log_section' not in df_logs_part.columns:
-                                df_logs_part['log_section'] = np.nan
-                            row['log_section'] = log_details['section']
-                            df_logs_part.loc[len(df_logs_part)] = row
-                        else:
+                        log_flattener = log_flatteners.get(data_log['type'])
+                        if log_flattener is None:
                             print(data_log['type'])
                             print(log_details)
                             assert False
-                    df_logs_part.loc[len(df_logs_part)] = row
+                        log_flattener(row, log_details, log_columns, log_rows)
+                    append_log_row(log_rows, log_columns, row)
+
+            if len(log_rows) > 0:
+                df_logs_new = pd.DataFrame(log_rows, columns=list(log_columns))
+                df_logs_new['time_server_parsed'] = find_date_series(df_logs_new['time_server'], unit='ms')
+                df_logs_new['time_client_parsed'] = find_date_series(df_logs_new['time_client'], unit='ms')
+                if df_logs_part.shape[0] > 0:
+                    df_logs_part = pd.concat([df_logs_part, df_logs_new], ignore_index=True)
+                else:
+                    df_logs_part = df_logs_new
 
             if len(df_logs_part) > 0:
                 os.makedirs(df_log_partial_folder_path, exist_ok=True)
                 df_logs_part.to_csv(df_logs_part_path, index=False)
 
-    dataframes_partial = []
+
+@lru_cache(maxsize=None)
+def log_attribute_name(attribute, prefix='log'):
+    return f"{prefix}_{re.sub(r'(?<!^)(?=[A-Z])', '_', attribute).lower()}"
+
+
+def flatten_log_attributes(row, log_details, log_columns):
+    # Nested values are left to the flattener of each event type
+    for attribute, value in log_details.items():
+        if type(value) != dict and type(value) != list:
+            attribute_parsed = log_attribute_name(attribute)
+            add_log_column(log_columns, attribute_parsed)
+            row[attribute_parsed] = value
+
+
+def flatten_log_key_sequence(row, log_details, log_columns, log_rows):
+    add_log_column(log_columns, 'log_section')
+    add_log_column(log_columns, 'log_key_sequence_index')
+    add_log_column(log_columns, 'log_key_sequence_timestamp')
+    add_log_column(log_columns, 'log_key_sequence_key')
+    add_log_column(log_columns, 'log_sentence')
+    row['log_section'] = log_details['section']
+    row['log_sentence'] = log_details['sentence']
+    for index, key_sequence in enumerate(log_details['keySequence']):
+        row['log_key_sequence_index'] = index
+        row['log_key_sequence_timestamp'] = key_sequence['timeStamp']
+        row['log_key_sequence_key'] = key_sequence['key'] if 'key' in key_sequence else np.nan
+        append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_movements(row, log_details, log_columns, log_rows):
+    flatten_log_attributes(row, log_details, log_columns)
+    for movement_data in log_details['points']:
+        for attribute, value in movement_data.items():
+            attribute_parsed = log_attribute_name(attribute, 'log_point')
+            if type(value) == dict:
+                for attribute_sub, value_sub in value.items():
+                    attribute_sub_parsed = log_attribute_name(attribute_sub, attribute_parsed)
+                    add_log_column(log_columns, attribute_sub_parsed)
+                    row[attribute_sub_parsed] = value_sub
+            else:
+                add_log_column(log_columns, attribute_parsed)
+                row[attribute_parsed] = value
+        append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_click(row, log_details, log_columns, log_rows):
+    flatten_log_attributes(row, log_details, log_columns)
+    for attribute, value in log_details['target'].items():
+        attribute_parsed = log_attribute_name(attribute, 'log_target')
+        add_log_column(log_columns, attribute_parsed)
+        row[attribute_parsed] = value
+    append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_query_results(row, log_details, log_columns, log_rows):
+    add_log_column(log_columns, 'log_section')
+    add_log_column(log_columns, 'log_url_amount')
+    row['log_section'] = log_details['section']
+    if 'urlAmount' in log_details:
+        row['log_url_amount'] = log_details['urlAmount']
+    else:
+        row['log_url_amount'] = len(log_details['urlArray'])
+
+
+def flatten_log_text_selection(row, log_details, log_columns, log_rows):
+    # Only the columns are registered, the copied, selected or pasted text itself is not kept
+    for attribute in log_details:
+        add_log_column(log_columns, log_attribute_name(attribute))
+    append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_details(row, log_details, log_columns, log_rows):
+    for attribute, value in log_details.items():
+        attribute_parsed = log_attribute_name(attribute)
+        add_log_column(log_columns, attribute_parsed)
+        row[attribute_parsed] = value
+    append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_query(row, log_details, log_columns, log_rows):
+    add_log_column(log_columns, 'log_section')
+    add_log_column(log_columns, 'log_query')
+    row['log_section'] = log_details['section']
+    row['log_query_text'] = log_details['query']['text']
+    row['log_query_text_encoded'] = log_details['query']['encoded']
+    append_log_row(log_rows, log_columns, row)
+
+
+def flatten_log_link_visited(row, log_details, log_columns, log_rows):
+    add_log_column(log_columns, 'log_section')
+    row['log_section'] = log_details['section']
+    append_log_row(log_rows, log_columns, row)
+
+
+# Each flattener registers the columns it fills and appends the rows of its event, the event row itself is appended afterwards
+log_flatteners = {
+    'keySequence': flatten_log_key_sequence,
+    'movements': flatten_log_movements,
+    'click': flatten_log_click,
+    'queryResults': flatten_log_query_results,
+    'copy': flatten_log_text_selection,
+    'cut': flatten_log_text_selection,
+    'context': flatten_log_details,
+    'init': flatten_log_details,
+    'window_blur': flatten_log_details,
+    'window_focus': flatten_log_details,
+    'resize': flatten_log_details,
+    'button': flatten_log_details,
+    'unload': flatten_log_details,
+    'shortcut': flatten_log_details,
+    'radioChange': flatten_log_details,
+    'scroll': flatten_log_details,
+    'selection': flatten_log_text_selection,
+    'paste': flatten_log_text_selection,
+    'text': flatten_log_text_selection,
+    'query': flatten_log_query,
+    'linkVisited': flatten_log_link_visited,
+}
+
+
+def merge_log_partials(partials_paths, path):
+    # The first pass only collects the union schema, the unused columns and the worker order, the second one streams the rows
+    partials = []
+    partials_workers = []
+    schema_frames = []
+    columns_types = {}
+    for partial_path in tqdm(partials_paths, desc="Discovering schema"):
+        partial_df = pd.read_csv(partial_path)
+        if partial_df.shape[0] > 0:
+            partials.append(partial_path)
+            partials_workers.append(partial_df['worker_id'].head(1))
+            schema_frames.append(partial_df.head(0))
+            for column in partial_df.columns:
+                values = partial_df[column].dropna()
+                if len(values) > 0:
+                    value_types = columns_types.setdefault(column, set())
+                    if path.endswith('.parquet'):
+                        value_types.update(values.map(type) if values.dtype == object else [type(values.iloc[0])])
+    if len(partials) == 0:
+        return 0, [], []
+
+    # Concatenating the empty partials yields the same dtypes as concatenating the partials themselves
+    schema_frame = pd.concat(schema_frames, ignore_index=True)
+    empty_cols = [column for column in schema_frame.columns if column not in columns_types]
+    schema_frame.drop(empty_cols, axis=1, inplace=True)
+    columns = list(schema_frame.columns)
+    # Workers are ordered by the same sort applied to the merged rows, whatever types their identifiers were parsed as
+    partials_workers = pd.concat(partials_workers, ignore_index=True).to_frame().assign(sequence=0)
+    partials = [partials[position] for position in partials_workers.sort_values(by=['worker_id', 'sequence']).index]
+
+    path_temp = f"{path}.part"
+    parquet_writer = None
+    if path.endswith('.parquet'):
+        schema = pa.Schema.from_pandas(schema_frame, preserve_index=False)
+        for column in columns:
+            if schema_frame[column].dtype == object:
+                schema = schema.set(schema.get_field_index(column), pa.field(column, arrow_type_for(columns_types[column])))
+        parquet_writer = pq.ParquetWriter(path_temp, schema, compression=dataframe_compression)
+    rows_written = 0
+    partials_chunk = []
+    rows_chunk = 0
+
+    def flush_chunk():
+        # Chunks always hold whole workers, which come in identifier order, so sorting each chunk sorts the whole file
+        df_chunk = pd.concat([schema_frame, *partials_chunk], ignore_index=True)[columns]
+        df_chunk.sort_values(by=['worker_id', 'sequence'], ascending=True, inplace=True)
+        if parquet_writer is not None:
+            parquet_writer.write_table(pa.Table.from_pandas(arrow_normalize(df_chunk, schema), schema=schema, preserve_index=False))
+        else:
+            df_chunk.to_csv(path_temp, index=False, mode='w' if rows_written == 0 else 'a', header=rows_written == 0)
+        return rows_written + len(df_chunk)
+
+    for partial_path in tqdm(partials, desc="Serializing rows"):
+        partial_df = pd.read_csv(partial_path)
+        partials_chunk.append(partial_df)
+        rows_chunk += len(partial_df)
+        if rows_chunk >= dataframe_chunk_size:
+            rows_written = flush_chunk()
+            partials_chunk = []
+            rows_chunk = 0
+    if len(partials_chunk) > 0:
+        rows_written = flush_chunk()
+    if parquet_writer is not None:
+        parquet_writer.close()
+    os.replace(path_temp, path)
+    return rows_written, columns, empty_cols
+
+
+if not os.path.exists(df_log_path):
+
+    acl_records_workers = {}
+    for index, acl_record in df_acl.iterrows():
+        acl_records_workers.setdefault(acl_record['worker_id'], []).append(acl_record)
+
+    if log_processes > 1:
+        console.print(f"Building partial log dataframes using [cyan]{log_processes}[/cyan] processes")
+        # Forked processes inherit the snapshots and settings already loaded, since this script cannot be re-imported
+        with ProcessPoolExecutor(max_workers=log_processes, mp_context=multiprocessing.get_context('fork')) as executor:
+            futures = [executor.submit(build_worker_log_partial, acl_records) for acl_records in acl_records_workers.values()]
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                future.result()
+    else:
+        for acl_records in tqdm(acl_records_workers.values()):
+            build_worker_log_partial(acl_records)
+
     df_partials_paths = glob(f"{df_log_partial_folder_path}/*")
 
     console.print(f"Merging together {len(df_partials_paths)} partial log dataframes")
 
-    for df_partial_path in tqdm(df_partials_paths):
-        partial_df = pd.read_csv(df_partial_path)
-        if partial_df.shape[0] > 0:
-            dataframes_partial.append(partial_df)
-    if len(dataframes_partial) > 0:
-        dataframe = pd.concat(dataframes_partial, ignore_index=True)
-        empty_cols = [col for col in dataframe.columns if dataframe[col].isnull().all()]
+    rows_written, columns, empty_cols = merge_log_partials(df_partials_paths, df_log_path)
+    if rows_written > 0:
         if len(empty_cols) > 0:
             console.print(f"Dropping unused columns: [yellow]{', '.join(empty_cols)}")
-        dataframe.drop(empty_cols, axis=1, inplace=True)
-        dataframe.sort_values(by=['worker_id', 'sequence'], ascending=True, inplace=True)
-        dataframe.to_csv(df_log_path, index=False)
-        console.print(f"Log data found: [green]{len(dataframe)}")
-        console.print(f"Dataframe shape: {dataframe.shape}")
+        console.print(f"Log data found: [green]{rows_written}")
+        console.print(f"Dataframe shape: {(rows_written, len(columns))}")
         console.print(f"Log data file serialized at path: [cyan on white]{df_log_path}")
     else:
         console.print(f"Log dataframe [yellow]empty[/yellow], dataframe not serialized.")
@@ -3625,18 +4141,14 @@ if enable_crawling:
 
     if os.path.exists(df_url_path):
 
-        df_url = pd.read_csv(df_url_path)
+        df_url = load_dataframe(df_url_path)
         df_url.drop_duplicates(subset='response_url', inplace=True)
         unique_urls_amount = len(df_url)
         console.print(f"Unique URLs: [green]{len(df_url)}")
 
         if os.path.exists(df_crawl_path):
-            df_crawl = pd.read_csv(df_crawl_path)
+            df_crawl = load_dataframe(df_crawl_path)
             console.print(f"Crawling dataframe [yellow]already detected[/yellow], loading in memory")
-            df_crawl_correct = df_crawl[df_crawl["response_error_code"].isnull()]
-            console.print(f"Pages correctly crawled: [green]{len(df_crawl_correct)}/{unique_urls_amount}[/green] [cyan]({(len(df_crawl_correct) / unique_urls_amount) * 100}%)")
-            url_crawled = list(df_crawl_correct['response_url'].values)
-            df_url = df_url[~df_url['response_url'].isin(url_crawled)]
         else:
             df_crawl = pd.DataFrame(columns=[
                 'response_uuid',
@@ -3647,91 +4159,296 @@ if enable_crawling:
                 'response_source_path',
                 'response_metadata_path'
             ])
+        # Rows only keep the columns already in the dataframe
+        if crawl_storage == 'store' and 'response_content_hash' not in df_crawl.columns:
+            df_crawl['response_content_hash'] = None
+        if crawl_refresh and 'response_unchanged' not in df_crawl.columns:
+            df_crawl['response_unchanged'] = None
+
+        if os.path.exists(crawling_journal_path):
+            # Results journaled by an interrupted crawl are compacted first, a line cut short by the interruption is dropped
+            journal_rows = []
+            with open(crawling_journal_path, 'r', encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        journal_rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+            console.print(f"Crawling journal [yellow]already detected[/yellow], replaying [cyan]{len(journal_rows)}[/cyan] results")
+            df_crawl = append_dataframe_rows(df_crawl, journal_rows)
+            save_dataframe(df_crawl, df_crawl_path, dataframe_compression)
+            os.remove(crawling_journal_path)
 
-        start = time_mod.time()
+        if df_crawl.shape[0] > 0:
+            df_crawl_correct = df_crawl[df_crawl["response_error_code"].isnull()]
+            console.print(f"Pages correctly crawled: [green]{len(df_crawl_correct)}/{unique_urls_amount}[/green] [cyan]({(len(df_crawl_correct) / unique_urls_amount) * 100}%)")
+            if crawl_refresh:
+                console.print(f"Refreshing [cyan]{len(df_url)}[/cyan] URLs, pages already crawled are requested conditionally")
+            else:
+                url_crawled = list(df_crawl_correct['response_url'].values)
+                df_url = df_url[~df_url['response_url'].isin(url_crawled)]
+
+        # Latest successful metadata of each page, whose validators make the refresh requests conditional
+        crawl_previous = {}
+        crawl_unchanged = set()
+        if crawl_refresh and df_crawl.shape[0] > 0:
+            uuids_crawled = set(df_crawl[df_crawl["response_error_code"].isnull()]['response_uuid'].values)
+            if crawl_storage == 'store':
+                if os.path.exists(crawling_metadata_index_path):
+                    with open(crawling_metadata_index_path, 'r', encoding="utf-8") as index_file:
+                        for line in index_file:
+                            # A record cut short by an interrupted crawl is dropped, as in the journal replay
+                            try:
+                                metadata = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+                            metadata_uuid = metadata['attributes']['response_uuid']
+                            if metadata_uuid in uuids_crawled and metadata['attributes']['response_error_code'] is None:
+                                crawl_previous[metadata_uuid] = metadata
+            else:
+                for metadata_uuid in uuids_crawled:
+                    metadata = read_json(f"{crawling_path_metadata}{metadata_uuid}_metadata.json")
+                    if 'attributes' in metadata.keys() and metadata['attributes']['response_error_code'] is None:
+                        crawl_previous[metadata_uuid] = metadata
+            console.print(f"Validators found for [cyan]{len(crawl_previous)}[/cyan] pages")
 
-        # Initialize connection pool
-        conn = aiohttp.TCPConnector(limit_per_host=100, limit=0, ttl_dns_cache=300)
-        PARALLEL_REQUESTS = 100
-        tasks = []
-        errors = []
-        results = []
+        start = time_mod()
+        crawl_rows = []
 
+        # Bodies are read from the socket in chunks and handed to the disk in blocks
+        CHUNK_SIZE = 64 * 1024
+        WRITE_SIZE = 1024 * 1024
+        # Longest pause honoured when a host answers with Retry-After
+        RETRY_AFTER_MAX = 300
 
-        async def gather_with_concurrency(n):
-            semaphore = asyncio.Semaphore(n)
-            session = aiohttp.ClientSession(connector=conn)
 
-            def build_response_dict(url, type, uuid, data, body=None):
+        async def crawl_urls(crawl_workers):
+            # Rows are handed out through a bounded queue, so only the pages being fetched are ever held in memory
+            conn = aiohttp.TCPConnector(limit_per_host=crawl_host_concurrency, limit=0, ttl_dns_cache=300)
+            session = aiohttp.ClientSession(connector=conn)
+            queue = asyncio.Queue(maxsize=crawl_workers * 2)
+            hosts_state = {}
+            retries_pending = set()
+            if crawl_storage == 'store' and os.path.exists(crawling_metadata_index_path) and os.path.getsize(crawling_metadata_index_path) > 0:
+                # A record cut short by an interrupted crawl is terminated, so the next one starts on its own line
+                with open(crawling_metadata_index_path, 'rb+') as index_file:
+                    index_file.seek(-1, os.SEEK_END)
+                    if index_file.read(1) != b'\n':
+                        index_file.write(b'\n')
+            metadata_index = open(crawling_metadata_index_path, 'a', encoding="utf-8") if crawl_storage == 'store' else None
+            journal = open(crawling_journal_path, 'a', encoding="utf-8")
+            metadata_executor = ThreadPoolExecutor(max_workers=1) if crawl_storage == 'store' else None
+            progress = tqdm(total=df_url.shape[0])
+
+            def build_response_dict(url, type, uuid, data, body=None, source_path=None, encoding=None, content_hash=None):
                 return {
                     'url': url,
                     'type': type,
                     'uuid': uuid,
                     'data': data,
-                    'body': body
+                    'body': body,
+                    'source_path': source_path,
+                    'encoding': encoding,
+                    'content_hash': content_hash
                 }
 
+            def build_conditional_headers(headers_previous):
+                # Stored header names went through camel_to_snake, so ETag may read as e_tag or etag
+                headers_previous = dict((attribute.replace('_', '').lower(), value) for attribute, value in headers_previous.items())
+                headers_conditional = {}
+                if type(headers_previous.get('etag')) == str:
+                    headers_conditional['If-None-Match'] = headers_previous['etag']
+                if type(headers_previous.get('lastmodified')) == str:
+                    headers_conditional['If-Modified-Since'] = headers_previous['lastmodified']
+                return headers_conditional
+
+            def normalize_headers(headers):
+                headers_lower = dict((camel_to_snake(k), v) for k, v in headers.items())
+                headers_lower_fix = {}
+                for attribute_fix, value_fix in headers_lower.items():
+                    if type(value_fix) == str:
+                        headers_lower_fix[attribute_fix] = value_fix.replace('\udc94', '')
+                    else:
+                        headers_lower_fix[attribute_fix] = value_fix
+                return headers_lower_fix
+
+            def build_source_path(response_url, response_uuid, headers):
+                if 'Content-Type' not in headers.keys():
+                    return None
+                content_type = headers['Content-Type']
+                if 'text/html' in content_type:
+                    return f"{crawling_path_source}{response_uuid}_source.html"
+                elif 'application/pdf' in content_type:
+                    return f"{crawling_path_source}{response_uuid}_source.pdf"
+                elif 'text/plain' in content_type:
+                    return f"{crawling_path_source}{response_uuid}_source.txt"
+                elif 'json' in content_type:
+                    return f"{crawling_path_source}{response_uuid}_source.json"
+                elif 'application/vnd.openxmlformats-officedocument.presentationml.presentation' in content_type:
+                    return f"{crawling_path_source}{response_uuid}_source.pptx"
+                elif 'application/octet-stream' in content_type:
+                    if 'Content-Disposition' in headers.keys():
+                        content_disposition_split = headers['Content-Disposition'].split(';')
+                        content_disposition_type = content_disposition_split[0]
+                        if content_disposition_type == 'attachment' and len(content_disposition_split) > 1:
+                            content_disposition_attachment_filename = content_disposition_split[1].split("=")[1]
+                            suffix = Path(content_disposition_attachment_filename).suffixes
+                            return f"{crawling_path_source}{response_uuid}_source{suffix}"
+                    else:
+                        suffix = Path(response_url).suffix
+                        return f"{crawling_path_source}{response_uuid}_source{suffix}"
+                return None
+
+            def open_source(source_path_temp):
+                if crawl_storage == 'store':
+                    return pa.CompressedOutputStream(source_path_temp, crawl_compression)
+                return open(source_path_temp, 'wb')
+
+            def close_source(source_file, source_path_temp, source_path, completed):
+                source_file.close()
+                if not completed:
+                    os.remove(source_path_temp)
+                elif crawl_storage == 'store' and os.path.exists(source_path):
+                    # The same body was already stored for another page
+                    os.remove(source_path_temp)
+                else:
+                    os.makedirs(os.path.dirname(source_path), exist_ok=True)
+                    os.replace(source_path_temp, source_path)
+
+            async def stream_body(resp, source_path, encoding):
+                # Bodies reach the disk in blocks written from a thread, text is still decoded along the way to reject invalid pages
+                decoder = None
+                if encoding is not None:
+                    try:
+                        decoder = codecs.getincrementaldecoder(encoding)()
+                    except LookupError:
+                        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                source_path_temp = None
+                if source_path is not None:
+                    source_path_temp = f"{crawling_path_store}{os.path.basename(source_path)}.part" if crawl_storage == 'store' else f"{source_path}.part"
+                source_file = await asyncio.to_thread(open_source, source_path_temp) if source_path_temp is not None else None
+                content_hash = hashlib.sha256() if crawl_storage == 'store' and source_file is not None else None
+                source_buffer = bytearray()
+                body_size = 0
+                completed = False
+                try:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        body_size += len(chunk)
+                        if body_size > crawl_max_body_size:
+                            return None
+                        if decoder is not None:
+                            decoder.decode(chunk)
+                        if content_hash is not None:
+                            content_hash.update(chunk)
+                        if source_file is not None:
+                            source_buffer += chunk
+                            if len(source_buffer) >= WRITE_SIZE:
+                                await asyncio.to_thread(source_file.write, bytes(source_buffer))
+                                source_buffer.clear()
+                    if decoder is not None:
+                        decoder.decode(b'', final=True)
+                    if source_file is not None and len(source_buffer) > 0:
+                        await asyncio.to_thread(source_file.write, bytes(source_buffer))
+                    if content_hash is not None:
+                        content_hash = content_hash.hexdigest()
+                        source_path = f"{crawling_path_store}{content_hash[:2]}/{content_hash}.{crawl_store_extension}"
+                    completed = True
+                finally:
+                    if source_file is not None:
+                        await asyncio.to_thread(close_source, source_file, source_path_temp, source_path, completed)
+                return body_size, source_path, content_hash
+
+            def write_metadata(result_url, result_metadata_path, metadata):
+                with open(result_metadata_path, 'w', encoding="utf-8") as f:
+                    try:
+                        json.dump(metadata, f, ensure_ascii=False, indent=4)
+                    except UnicodeEncodeError:
+                        print(f"Unicode Encode error detected for page: {result_url}")
+
+            def append_metadata(result_url, metadata):
+                try:
+                    metadata_index.write(f"{json.dumps(metadata, ensure_ascii=False)}\n")
+                    metadata_index.flush()
+                except UnicodeEncodeError:
+                    print(f"Unicode Encode error detected for page: {result_url}")
+
+            async def save_metadata(result_url, result_metadata_path, metadata):
+                if crawl_storage == 'store':
+                    # A single thread appends to the index, so records never interleave
+                    await asyncio.get_running_loop().run_in_executor(metadata_executor, append_metadata, result_url, metadata)
+                else:
+                    await asyncio.to_thread(write_metadata, result_url, result_metadata_path, metadata)
+
             # heres the logic for the generator
             async def get(row_url):
                 response_url = row_url['response_url']
                 response_uuid = row_url['response_uuid']
-                async with semaphore:
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.5005.61/63 Safari/537.36 Edg/100.0.1185.39',
-                        'Accept-Encoding': 'gzip'
-                    }
-                    try:
-                        async with session.get(response_url, headers=headers, raise_for_status=True, timeout=30) as resp:
-                            if 'octet-stream' in resp.content_type or 'application/pdf' in resp.content_type or 'application/vnd.openxmlformats-officedocument.presentationml.presentation' in resp.content_type:
-                                return build_response_dict(response_url, 'data', response_uuid, resp, await resp.read())
-                            elif 'text/html' in resp.content_type or 'text/plain' or 'json' in resp.content_type:
-                                return build_response_dict(response_url, 'data', response_uuid, resp, await resp.text())
-                            else:
-                                print(response_url)
-                                print(resp.content_type)
-                                print(resp.content_disposition)
-                                assert False
-                    except asyncio.TimeoutError as error:
-                        error_code = 'timeout_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except ClientPayloadError as error:
-                        error_code = 'client_payload_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except ClientConnectorError as error:
-                        error_code = 'client_connector_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except ServerDisconnectedError as error:
-                        error_code = 'server_disconnected_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except TooManyRedirects as error:
-                        error_code = 'too_many_redirects_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except ClientOSError as error:
-                        error_code = 'client_os_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except ClientResponseError as error:
-                        error_code = 'client_os_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except UnicodeDecodeError as error:
-                        error_code = 'unicode_decode_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-                    except UnicodeError as error:
-                        error_code = 'unicode_error'
-                        return build_response_dict(response_url, 'error', response_uuid, error, error_code)
-
-            console.print("Generating asynchronous requests")
-            for index, row_url in tqdm(df_url.iterrows(), total=df_url.shape[0]):
-                tasks.append(asyncio.create_task(get(row_url)))
-
-            console.print("Processing asynchronous requests")
-            for request_current in tqdm(asyncio.as_completed(tasks), total=len(tasks)):
-                result = await request_current
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.5005.61/63 Safari/537.36 Edg/100.0.1185.39',
+                    'Accept-Encoding': 'gzip'
+                }
+                if response_uuid in crawl_previous:
+                    headers.update(build_conditional_headers(crawl_previous[response_uuid]['data']))
+                try:
+                    async with session.get(response_url, headers=headers, raise_for_status=True, timeout=30) as resp:
+                        if resp.status == 304:
+                            return build_response_dict(response_url, 'unchanged', response_uuid, resp)
+                        if 'octet-stream' in resp.content_type or 'application/pdf' in resp.content_type or 'application/vnd.openxmlformats-officedocument.presentationml.presentation' in resp.content_type:
+                            response_decoded = False
+                        elif 'text/html' in resp.content_type or 'text/plain' or 'json' in resp.content_type:
+                            response_decoded = True
+                        else:
+                            print(response_url)
+                            print(resp.content_type)
+                            print(resp.content_disposition)
+                            assert False
+                        try:
+                            response_encoding = resp.get_encoding()
+                        except RuntimeError:
+                            # Without a charset no encoding is recorded, the body is still checked as utf-8 like resp.text() did
+                            response_encoding = None
+                        result_source_path = build_source_path(response_url, response_uuid, flatten(resp.headers))
+                        body_stored = await stream_body(resp, result_source_path, (response_encoding or 'utf-8') if response_decoded else None)
+                        if body_stored is None:
+                            error_code = 'body_size_error'
+                            return build_response_dict(response_url, 'error', response_uuid, None, error_code)
+                        body_size, result_source_path, result_content_hash = body_stored
+                        return build_response_dict(response_url, 'data', response_uuid, resp, source_path=result_source_path, encoding=response_encoding, content_hash=result_content_hash)
+                except asyncio.TimeoutError as error:
+                    error_code = 'timeout_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except ClientPayloadError as error:
+                    error_code = 'client_payload_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except ClientConnectorError as error:
+                    error_code = 'client_connector_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except ServerDisconnectedError as error:
+                    error_code = 'server_disconnected_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except TooManyRedirects as error:
+                    error_code = 'too_many_redirects_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except ClientOSError as error:
+                    error_code = 'client_os_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except ClientResponseError as error:
+                    error_code = 'client_os_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except UnicodeDecodeError as error:
+                    error_code = 'unicode_decode_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+                except UnicodeError as error:
+                    error_code = 'unicode_error'
+                    return build_response_dict(response_url, 'error', response_uuid, error, error_code)
+
+            async def process_result(result):
                 result_url = result['url']
                 result_type = result['type']
                 result_uuid = result['uuid']
                 result_data = result['data']
                 result_body = result['body']
-                result_metadata_path = f"{crawling_path_metadata}{result_uuid}_metadata.json"
+                result_metadata_path = crawling_metadata_index_path if crawl_storage == 'store' else f"{crawling_path_metadata}{result_uuid}_metadata.json"
                 timestamp_now = datetime.now().timestamp()
                 row = {
                     'response_uuid': result_uuid,
@@ -3743,94 +4460,176 @@ if enable_crawling:
                     'response_metadata_path': None,
                 }
                 if result_type == 'error':
-                    errors.append(result)
                     row['response_error_code'] = result_body
                     if hasattr(result_data, 'status'):
                         row['response_status_code'] = result_data.status
-                    with open(result_metadata_path, 'w', encoding="utf-8") as f:
-                        json.dump({
-                            'attributes': row,
+                    # A failed refresh leaves the metadata of the copy already stored untouched
+                    if result_uuid not in crawl_previous or crawl_storage == 'store':
+                        await save_metadata(result_url, result_metadata_path, {
+                            'attributes': dict(row),
                             'data': str(result_data)
-                        }, f, ensure_ascii=False, indent=4)
+                        })
+                elif result_type == 'unchanged':
+                    # The copy already stored is still current, only the headers sent along with the 304 are merged
+                    metadata_previous = crawl_previous[result_uuid]
+                    for attribute in ['response_encoding', 'response_content_length', 'response_content_type', 'response_content_disposition', 'response_source_path', 'response_content_hash']:
+                        if attribute in metadata_previous['attributes'].keys():
+                            row[attribute] = metadata_previous['attributes'][attribute]
+                    row['response_status_code'] = result_data.status
+                    row['response_unchanged'] = True
+                    crawl_unchanged.add(result_uuid)
+                    await save_metadata(result_url, result_metadata_path, {
+                        'attributes': dict(row),
+                        'data': {**metadata_previous['data'], **normalize_headers(flatten(result_data.headers))}
+                    })
                 else:
-                    results.append(result)
                     row['response_status_code'] = result_data.status
-                    try:
-                        row['response_encoding'] = result_data.get_encoding().lower() if result_data.get_encoding() else None
-                    except RuntimeError:
-                        row['response_encoding'] = None
+                    row['response_encoding'] = result['encoding'].lower() if result['encoding'] else None
                     row['response_content_length'] = result_data.content_length
                     row['response_content_type'] = result_data.content_length
                     headers = flatten(result_data.headers)
                     if 'Content-Type' in headers.keys():
-                        result_source_path = None
                         row['response_content_type'] = headers['Content-Type']
-                        if 'text/html' in row['response_content_type']:
-                            result_source_path = f"{crawling_path_source}{result_uuid}_source.html"
-                            with open(result_source_path, 'w', encoding=row['response_encoding']) as f:
-                                f.write(result_body)
-                        elif 'application/pdf' in row['response_content_type']:
-                            result_source_path = f"{crawling_path_source}{result_uuid}_source.pdf"
-                            with open(result_source_path, 'wb') as f:
-                                f.write(result_body)
-                        elif 'text/plain' in row['response_content_type']:
-                            result_source_path = f"{crawling_path_source}{result_uuid}_source.txt"
-                            with open(result_source_path, 'w', encoding=row['response_encoding']) as f:
-                                f.write(result_body)
-                        elif 'json' in row['response_content_type']:
-                            response_content_decoded = result_body
-                            result_source_path = f"{crawling_path_source}{result_uuid}_source.json"
-                            with open(result_source_path, 'w', encoding=row['response_encoding']) as f:
-                                f.write(response_content_decoded)
-                        elif 'application/vnd.openxmlformats-officedocument.presentationml.presentation' in row['response_content_type']:
-                            result_source_path = f"{crawling_path_source}{result_uuid}_source.pptx"
-                            with open(result_source_path, 'wb') as f:
-                                f.write(result_body)
-                        elif 'application/octet-stream' in row['response_content_type']:
-                            if 'Content-Disposition' in headers.keys():
-                                row['response_content_disposition'] = headers['Content-Disposition']
-                                content_disposition_split = row['response_content_disposition'].split(';')
-                                content_disposition_type = content_disposition_split[0]
-                                if content_disposition_type == 'attachment' and len(content_disposition_split) > 1:
-                                    content_disposition_attachment_filename = content_disposition_split[1].split("=")[1]
-                                    suffix = Path(content_disposition_attachment_filename).suffixes
-                                    result_source_path = f"{crawling_path_source}{result_uuid}_source{suffix}"
-                                    with open(result_source_path, 'wb') as f:
-                                        f.write(result_body)
-                            else:
-                                suffix = Path(result_url).suffix
-                                result_source_path = f"{crawling_path_source}{result_uuid}_source{suffix}"
-                                with open(result_source_path, 'wb') as f:
-                                    f.write(result_body)
-                    row['response_source_path'] = result_source_path
-                    with open(result_metadata_path, 'w', encoding="utf-8") as f:
-                        headers_lower = dict((camel_to_snake(k), v) for k, v in headers.items())
-                        headers_lower_fix = {}
-                        for attribute_fix, value_fix in headers_lower.items():
-                            if type(value_fix) == str:
-                                headers_lower_fix[attribute_fix] = value_fix.replace('\udc94', '')
-                            else:
-                                headers_lower_fix[attribute_fix] = value_fix
-                        try:
-                            json.dump({
-                                'attributes': row,
-                                'data': headers_lower_fix
-                            }, f, ensure_ascii=False, indent=4)
-                        except UnicodeEncodeError:
-                            print(f"Unicode Encode error detected for page: {result_url}")
+                        if 'application/octet-stream' in row['response_content_type'] and 'Content-Disposition' in headers.keys():
+                            row['response_content_disposition'] = headers['Content-Disposition']
+                    row['response_source_path'] = result['source_path']
+                    if crawl_storage == 'store':
+                        row['response_content_hash'] = result['content_hash']
+                    await save_metadata(result_url, result_metadata_path, {
+                        'attributes': dict(row),
+                        'data': normalize_headers(headers)
+                    })
                 row['response_metadata_path'] = result_metadata_path
-                df_crawl.loc[len(df_crawl)] = row
-                if len(df_crawl) % 1000 == 0:
-                    df_crawl.to_csv(df_crawl_path, index=False)
-
-            await session.close()
-
+                # Each result is journaled as soon as it is known, the dataframe is only written once the crawl ends
+                crawl_rows.append(row)
+                journal.write(json.dumps(row) + '\n')
+                journal.flush()
+
+            def get_host_state(response_url):
+                host = urlparse(response_url).netloc
+                if host not in hosts_state:
+                    hosts_state[host] = {
+                        'condition': asyncio.Condition(),
+                        'limit': max(1, crawl_host_concurrency // 4),
+                        'active': 0,
+                        'successes': 0,
+                        'blocked_until': 0.0
+                    }
+                return hosts_state[host]
+
+            async def acquire_host(host_state):
+                while True:
+                    delay = host_state['blocked_until'] - time_mod()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                        continue
+                    async with host_state['condition']:
+                        if host_state['active'] < host_state['limit']:
+                            host_state['active'] += 1
+                            return
+                        await host_state['condition'].wait()
+
+            async def release_host(host_state):
+                async with host_state['condition']:
+                    host_state['active'] -= 1
+                    host_state['condition'].notify_all()
+
+            def is_retryable(result):
+                if isinstance(result['data'], ClientResponseError):
+                    return result['data'].status in (429, 500, 502, 503, 504)
+                return result['body'] in ('timeout_error', 'client_payload_error', 'client_connector_error', 'server_disconnected_error', 'client_os_error')
+
+            def update_host_state(host_state, result):
+                # Hosts grow by one request after a full window of successes and halve when they push back
+                if result['type'] != 'error':
+                    host_state['successes'] += 1
+                    if host_state['successes'] >= host_state['limit'] and host_state['limit'] < crawl_host_concurrency:
+                        host_state['limit'] += 1
+                        host_state['successes'] = 0
+                    return None
+                error = result['data']
+                throttled = isinstance(error, ClientResponseError) and error.status in (429, 503)
+                if not throttled and result['body'] not in ('timeout_error', 'server_disconnected_error'):
+                    return None
+                host_state['limit'] = max(1, host_state['limit'] // 2)
+                host_state['successes'] = 0
+                retry_after = parse_retry_after(error.headers.get('Retry-After')) if throttled and error.headers else None
+                if retry_after is not None:
+                    retry_after = min(retry_after, RETRY_AFTER_MAX)
+                    host_state['blocked_until'] = max(host_state['blocked_until'], time_mod() + retry_after)
+                return retry_after
+
+            async def retry_later(row_url, attempt, delay):
+                await asyncio.sleep(delay)
+                await queue.put((row_url, attempt))
+
+            async def produce():
+                # Rows are interleaved across hosts, so that a single slow domain does not hold every worker
+                urls_hosts = df_url['response_url'].map(lambda response_url: urlparse(response_url).netloc)
+                for position in np.argsort(urls_hosts.groupby(urls_hosts).cumcount().to_numpy(), kind='stable'):
+                    await queue.put((df_url.iloc[position], 0))
+
+            async def consume():
+                while True:
+                    row_url, attempt = await queue.get()
+                    try:
+                        host_state = get_host_state(row_url['response_url'])
+                        await acquire_host(host_state)
+                        try:
+                            result = await get(row_url)
+                        finally:
+                            await release_host(host_state)
+                        retry_after = update_host_state(host_state, result)
+                        if result['type'] == 'error' and attempt < crawl_retries and is_retryable(result):
+                            delay = max(retry_after or 0, 2 ** attempt)
+                            retries_pending.add(asyncio.create_task(retry_later(row_url, attempt + 1, delay)))
+                        else:
+                            await process_result(result)
+                            progress.update(1)
+                    finally:
+                        queue.task_done()
+
+            async def crawl_all():
+                await produce()
+                # Retries still waiting for their backoff are enqueued later, so the queue is drained until none is left
+                while True:
+                    await queue.join()
+                    retries_pending.difference_update([task for task in retries_pending if task.done()])
+                    if len(retries_pending) == 0:
+                        break
+                    await asyncio.wait(retries_pending)
 
-        loop = asyncio.get_event_loop()
-        loop.run_until_complete(gather_with_concurrency(PARALLEL_REQUESTS))
-        conn.close()
+            console.print(f"Processing asynchronous requests using [cyan]{crawl_workers}[/cyan] workers")
+            consumers = [asyncio.create_task(consume()) for _ in range(crawl_workers)]
+            crawling = asyncio.create_task(crawl_all())
+            try:
+                # Consumers only stop on an unexpected error, which is raised here instead of leaving the queue stalled
+                done, _ = await asyncio.wait([crawling, *consumers], return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task.result()
+            finally:
+                tasks_left = [crawling, *consumers, *retries_pending]
+                for task in tasks_left:
+                    task.cancel()
+                await asyncio.gather(*tasks_left, return_exceptions=True)
+                progress.close()
+                await session.close()
+                if metadata_index is not None:
+                    metadata_executor.shutdown()
+                    metadata_index.close()
+                journal.close()
+
+
+        asyncio.run(crawl_urls(crawl_workers))
+        df_crawl = append_dataframe_rows(df_crawl, crawl_rows)
+        console.print(f"Crawling completed in [cyan]{round(time_mod() - start, 2)}[/cyan] seconds")
 
         if df_crawl.shape[0] > 0:
+            if crawl_refresh:
+                # Each page keeps its latest successful row, a failed refresh does not replace the copy already stored
+                df_crawl['response_correct'] = df_crawl["response_error_code"].isnull()
+                df_crawl = df_crawl.sort_values(['response_correct', 'response_timestamp'], kind='stable').drop_duplicates(subset='response_uuid', keep='last').drop(columns='response_correct').reset_index(drop=True)
+                console.print(f"Pages unchanged since the previous crawl: [green]{len(crawl_unchanged)}/{len(crawl_previous)}")
             df_crawl_correct = df_crawl[df_crawl["response_error_code"].isnull()]
             df_crawl_incorrect = df_crawl[df_crawl["response_error_code"] != np.nan]
             empty_cols = [col for col in df_crawl.columns if df_crawl[col].isnull().all()]
@@ -3838,11 +4637,13 @@ if enable_crawling:
                 console.print(f"Dropping unused columns: [yellow]{', '.join(empty_cols)}")
             df_crawl.drop(empty_cols, axis=1, inplace=True)
             df_crawl.drop_duplicates(inplace=True)
-            df_crawl.to_csv(df_crawl_path, index=False)
+            save_dataframe(df_crawl, df_crawl_path, dataframe_compression)
+            os.remove(crawling_journal_path)
             console.print(f"Pages correctly crawled: [green]{len(df_crawl_correct)}/{unique_urls_amount}[/green] [cyan]({(len(df_crawl_correct) / unique_urls_amount) * 100}%)")
             console.print(f"Dataframe shape: {df_crawl.shape}")
             console.print(f"Worker crawling dataframe serialized at path: [cyan on white]{df_crawl_path}")
         else:
+            os.remove(crawling_journal_path)
             console.print(f"Dataframe shape: {df_crawl.shape}")
             console.print(f"Worker crawling dataframe [yellow]empty[/yellow], dataframe not serialized.")
 
@@ -3851,3 +4652,154 @@ if enable_crawling:
 
 else:
     console.print(f"Worker URLs crawling [yellow]not enabled[/yellow], skipping")
+
+
+def read_crawled_source(source_path):
+    # Blobs kept by crawl_storage=store are decompressed according to their extension, other sources are read as they are
+    with pa.input_stream(source_path, compression='detect') as source:
+        return source.read()
+
+
+def decode_crawled_source(body, encoding_recorded=None):
+    # The charset recorded while crawling is tried after utf-8 and before guessing one with chardet
+    encodings = ['utf-8']
+    if isinstance(encoding_recorded, str) and encoding_recorded.lower() != 'utf-8':
+        encodings.append(encoding_recorded)
+    for encoding in encodings:
+        try:
+            return body.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+    encoding = chardet.detect(body[:65536])['encoding'] or 'latin-1'
+    try:
+        return body.decode(encoding, errors='replace'), encoding
+    except LookupError:
+        return body.decode('latin-1'), 'latin-1'
+
+
+def extract_source_text(record):
+    row = {
+        'response_uuid': record['response_uuid'],
+        'response_url': record['response_url'],
+        'text_source_path': record['response_source_path'],
+        'text_source_mtime': record['source_mtime'],
+        'text_type': None,
+        'text_title': None,
+        'text_language': None,
+        'text_length': None,
+        'text_content': None,
+        'text_error': None
+    }
+    try:
+        body = read_crawled_source(record['response_source_path'])
+        # The type is sniffed from the body, since store blobs carry no extension
+        if body[:5] == b'%PDF-':
+            reader = PdfReader(io.BytesIO(body))
+            row['text_type'] = 'pdf'
+            text = ' '.join(page.extract_text() or '' for page in reader.pages)
+            title = reader.metadata.title if reader.metadata is not None else None
+            language = reader.trailer['/Root'].get('/Lang')
+        elif b'\x00' in body[:4096]:
+            row['text_error'] = 'unsupported_content'
+            return row
+        else:
+            text, encoding = decode_crawled_source(body, record['response_encoding'])
+            title = None
+            language = None
+            if re.search(r'<(!doctype html|html|head|body)[\s>]', text[:4096], re.IGNORECASE):
+                row['text_type'] = 'html'
+                tree = lxml.html.document_fromstring(body, parser=lxml.html.HTMLParser(encoding=encoding))
+                for element in tree.xpath('//script|//style|//noscript|//template'):
+                    element.drop_tree()
+                # Text nodes are joined with a space, so adjacent blocks do not run into each other
+                text = ' '.join((tree.find('body') if tree.find('body') is not None else tree).itertext())
+                title = tree.findtext('.//title')
+                language = tree.get('lang') or tree.get('{http://www.w3.org/XML/1998/namespace}lang')
+            else:
+                row['text_type'] = 'text'
+        text = ' '.join(text.split())
+        row['text_title'] = ' '.join(str(title).split()) if title else None
+        row['text_language'] = str(language).strip() if language else None
+        row['text_length'] = len(text)
+        row['text_content'] = text
+    except Exception as error:
+        # Malformed documents are recorded instead of stopping the whole extraction
+        row['text_error'] = type(error).__name__
+    return row
+
+
+if enable_crawling:
+
+    console.rule(f"{step_index} - Extracting Crawled Text")
+    step_index = step_index + 1
+
+    if os.path.exists(df_crawl_path):
+
+        df_crawl = load_dataframe(df_crawl_path)
+        # Columns left empty by the crawl are dropped when it is serialized
+        df_sources = df_crawl.reindex(columns=['response_uuid', 'response_url', 'response_error_code', 'response_source_path', 'response_encoding'])
+        df_sources = df_sources[df_sources['response_error_code'].isnull() & df_sources['response_source_path'].notna()]
+        df_sources = df_sources.drop_duplicates(subset='response_uuid', keep='last')
+        df_sources = df_sources[df_sources['response_source_path'].map(os.path.exists)].copy()
+        df_sources['source_mtime'] = df_sources['response_source_path'].map(lambda source_path: os.stat(source_path).st_mtime_ns)
+        console.print(f"Sources stored: [green]{len(df_sources)}")
+
+        if os.path.exists(df_crawl_text_path):
+            df_text = load_dataframe(df_crawl_text_path)
+            console.print(f"Crawled text dataframe [yellow]already detected[/yellow], loading in memory")
+            # A source is extracted again only when a later crawl replaced it
+            sources_extracted = set(zip(df_text['response_uuid'], df_text['text_source_path'], df_text['text_source_mtime']))
+            df_sources = df_sources[[source not in sources_extracted for source in zip(df_sources['response_uuid'], df_sources['response_source_path'], df_sources['source_mtime'])]]
+        else:
+            df_text = pd.DataFrame(columns=[
+                'response_uuid',
+                'response_url',
+                'text_source_path',
+                'text_source_mtime',
+                'text_type',
+                'text_title',
+                'text_language',
+                'text_length',
+                'text_content',
+                'text_error'
+            ])
+
+        sources_records = df_sources.to_dict('records')
+        console.print(f"Sources to extract: [green]{len(sources_records)}")
+
+        if len(sources_records) > 0:
+            start = time_mod()
+            executor = ProcessPoolExecutor(max_workers=crawl_text_processes, mp_context=multiprocessing.get_context('fork')) if crawl_text_processes > 1 else None
+            if executor is not None:
+                console.print(f"Extracting text using [cyan]{crawl_text_processes}[/cyan] processes")
+            try:
+                # The dataframe is serialized after each chunk, so an interrupted extraction resumes from the last one
+                for chunk_start in range(0, len(sources_records), dataframe_chunk_size):
+                    sources_chunk = sources_records[chunk_start:chunk_start + dataframe_chunk_size]
+                    if executor is not None:
+                        text_rows = list(tqdm(executor.map(extract_source_text, sources_chunk, chunksize=16), total=len(sources_chunk)))
+                    else:
+                        text_rows = [extract_source_text(source_record) for source_record in tqdm(sources_chunk)]
+                    df_text = df_text[~df_text['response_uuid'].isin([text_row['response_uuid'] for text_row in text_rows])]
+                    df_text = pd.concat([df_text, pd.DataFrame(text_rows, columns=df_text.columns)], ignore_index=True)
+                    save_dataframe(df_text, df_crawl_text_path, dataframe_compression)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+            console.print(f"Extraction completed in [cyan]{round(time_mod() - start, 2)}[/cyan] seconds")
+
+        if df_text.shape[0] > 0:
+            console.print(f"Pages with text extracted: [green]{int(df_text['text_error'].isnull().sum())}/{len(df_text)}")
+            # The language is not detected, it is only read from the HTML lang attribute or the PDF /Lang entry
+            console.print(f"Pages declaring their language: [green]{int(df_text['text_language'].notna().sum())}/{len(df_text)}")
+            console.print(f"Dataframe shape: {df_text.shape}")
+            console.print(f"Worker crawling text dataframe serialized at path: [cyan on white]{df_crawl_text_path}")
+        else:
+            console.print(f"Dataframe shape: {df_text.shape}")
+            console.print(f"Worker crawling text dataframe [yellow]empty[/yellow], dataframe not serialized.")
+
+    else:
+        console.print(f"Text extraction [yellow]was not performed[/yellow]; there are no crawled pages.")
+
+else:
+    console.print(f"Worker crawled text extraction [yellow]not enabled[/yellow], skipping")
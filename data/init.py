@@ -24,9 +24,11 @@ from mako.template import Template
 from python_on_whales import DockerClient
 from datetime import datetime
 from zipfile import ZipFile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from distutils.util import strtobool
 from pathlib import Path
 from shutil import copy2
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from docker.errors import ImageNotFound
 from dotenv import load_dotenv
@@ -122,6 +124,11 @@ admin_user = os.getenv('admin_user')
 admin_password = os.getenv('admin_password')
 server_config = os.getenv('server_config')
 enable_solver = strtobool(os.getenv('enable_solver')) if os.getenv('enable_solver') is not None else False
+deploy_threads = int(os.getenv('deploy_threads')) if os.getenv('deploy_threads') is not None else 8
+deploy_multipart_threshold = int(float(os.getenv('deploy_multipart_threshold')) * 1024 * 1024) if os.getenv('deploy_multipart_threshold') is not None else 8 * 1024 * 1024
+deploy_force = strtobool(os.getenv('deploy_force')) if os.getenv('deploy_force') is not None else False
+build_cache = strtobool(os.getenv('build_cache')) if os.getenv('build_cache') is not None else True
+build_cache_size = int(os.getenv('build_cache_size')) if os.getenv('build_cache_size') is not None else 3
 aws_region = os.getenv('aws_region')
 language_code = os.getenv('language_code')
 aws_private_bucket = os.getenv('aws_private_bucket')
@@ -3108,6 +3115,33 @@ with console.status("Generating configuration policy", spinner="aesthetic") as s
     yarn_exe = _resolve_exe("yarn", node_env)
     xlf_merge_exe = _resolve_exe("xlf-merge", node_env)
 
+    # ------------------------------------------------------------------
+    # Build cache (keyed on everything that shapes the Angular output)
+    # ------------------------------------------------------------------
+
+    def _compute_build_key() -> str:
+        digest = hashlib.sha256()
+        # messages.xlf and the -old.xlf backups are regenerated by the i18n step itself
+        source_paths = sorted(
+            p for p in (CORE_DIR / "src").rglob("*")
+            if p.is_file() and p.name != "messages.xlf" and not p.name.endswith("-old.xlf")
+        )
+        source_paths += [CORE_DIR / name for name in ("angular.json", "package.json", "yarn.lock", "tsconfig.json", "tsconfig.app.json")]
+        source_paths += [
+            Path(f"{folder_build_skeleton_path}document.ts"),
+            Path(f"{folder_build_skeleton_path}goldChecker.ts"),
+            Path(f"{folder_build_env_path}environment.ts"),
+            Path(f"{folder_build_env_path}environment.prod.ts"),
+        ]
+        for source_path in source_paths:
+            if source_path.exists():
+                digest.update(source_path.relative_to(CORE_DIR).as_posix().encode())
+                digest.update(source_path.read_bytes())
+        # The base href is baked into the build output
+        digest.update(f"{language_code}|/{task_name}/{batch_name}/".encode())
+        return digest.hexdigest()
+
+
     # ------------------------------------------------------------------
     # i18n extraction + merge (run from CORE_DIR)
     # ------------------------------------------------------------------
@@ -3142,27 +3176,60 @@ with console.status("Generating configuration policy", spinner="aesthetic") as s
             )
             os.remove(locale_file_existing_temp_path)
 
-    # ------------------------------------------------------------------
-    # Angular build (run from CORE_DIR)
-    # ------------------------------------------------------------------
+    # The key is computed after the merge, so it covers the translations the build actually reads
+    build_cache_root = CORE_DIR / "dist" / "cache"
+    build_cache_hit = False
+    if build_cache:
+        status.update("Computing build cache key")
+        build_cache_entry = build_cache_root / _compute_build_key()
+        build_cache_hit = build_cache_entry.is_dir()
+        if build_cache_hit:
+            console.print(f"Build cache [green]hit[/green], reusing: [italic underline]{build_cache_entry}[/italic underline]")
+            if folder_build_result_path.exists():
+                shutil.rmtree(folder_build_result_path)
+            shutil.copytree(build_cache_entry, folder_build_result_path)
+            os.utime(build_cache_entry)
+        else:
+            console.print(f"Build cache [yellow]miss[/yellow], key: [italic]{build_cache_entry.name}[/italic]")
 
-    configuration = "production" if language_code == "en-US" else f"production-{language_code}"
-    _run_streamed(
-        [
-            yarn_exe,
-            "run",
-            "build",
-            "--configuration",
-            configuration,
-            "--output-hashing=none",
-            "--named-chunks=false",
-            "--base-href",
-            f"/{task_name}/{batch_name}/",
-        ],
-        "Executing build command, please wait",
-        cwd=CORE_DIR,
-        env=node_env,
-    )
+    if not build_cache_hit:
+
+        # ------------------------------------------------------------------
+        # Angular build (run from CORE_DIR)
+        # ------------------------------------------------------------------
+
+        configuration = "production" if language_code == "en-US" else f"production-{language_code}"
+        _run_streamed(
+            [
+                yarn_exe,
+                "run",
+                "build",
+                "--configuration",
+                configuration,
+                "--output-hashing=none",
+                "--named-chunks=false",
+                "--base-href",
+                f"/{task_name}/{batch_name}/",
+            ],
+            "Executing build command, please wait",
+            cwd=CORE_DIR,
+            env=node_env,
+        )
+
+        if build_cache:
+            status.update("Storing build output in cache")
+            # The output is copied next to the entry and moved onto its key once complete, so an interrupted copy is never a hit
+            for build_cache_entry_partial in build_cache_root.glob("*.part"):
+                shutil.rmtree(build_cache_entry_partial, ignore_errors=True)
+            build_cache_entry_temp = build_cache_root / f"{build_cache_entry.name}.part"
+            shutil.copytree(folder_build_result_path, build_cache_entry_temp)
+            os.replace(build_cache_entry_temp, build_cache_entry)
+            os.utime(build_cache_entry)
+            # Each entry is a full copy of the build output, so only the build_cache_size most recently used are kept
+            build_cache_entries = sorted((p for p in build_cache_root.iterdir() if p.is_dir() and p.suffix != ".part"), key=lambda p: p.stat().st_mtime, reverse=True)
+            for build_cache_entry_old in build_cache_entries[build_cache_size:]:
+                shutil.rmtree(build_cache_entry_old, ignore_errors=True)
+            console.print(f"Build output cached: [italic underline]{build_cache_entry}[/italic underline]")
 
     # ------------------------------------------------------------------
     # Merge JS assets with esbuild
@@ -3350,133 +3417,101 @@ with console.status("Generating configuration policy", spinner="aesthetic") as s
     s3_deploy_path = f"{task_name}/{batch_name}/"
 
 
-    def upload(path: str, bucket: str, key: str, title: str, content_type: str, acl: str | None = None) -> None:
-        panel = Panel(
-            f"Region: [italic white on black]{aws_region}[/italic white on black]\n"
-            f"Bucket: [italic white on black]{bucket}[/italic white on black]\n"
-            f"File: [italic white on black]{path}[/italic white on black]\n"
-            f"Key: [italic white on black]{key}[/italic white on black]\n"
-            f"Path: [italic white on black]s3://{aws_region}/{bucket}/{key}[/italic white on black]\n"
-            f"ACL: {acl}",
-            title=title,
-        )
-        console.print(panel)
-
-        with open(path, "rb") as fh:
-            if acl:
-                response = s3_client.put_object(
-                    Body=fh, Bucket=bucket, Key=key, ContentType=content_type, ACL=acl
-                )
-            else:
-                response = s3_client.put_object(
-                    Body=fh, Bucket=bucket, Key=key, ContentType=content_type
-                )
-
-        console.print(
-            f"HTTP Status Code: {response['ResponseMetadata']['HTTPStatusCode']}, ETag: {response['ETag']}"
-        )
+    deploy_transfer_config = TransferConfig(
+        multipart_threshold=deploy_multipart_threshold,
+        multipart_chunksize=deploy_multipart_threshold,
+        max_concurrency=deploy_threads,
+    )
 
 
-    console.print("[white on blue bold]Generator configuration[/white on blue bold]")
-    upload(
-        f"{folder_tasks_batch_config_path}admin.json",
-        aws_private_bucket,
-        f"{s3_private_generator_path}admin.json",
-        "Admin Credentials",
-        "application/json",
-        "bucket-owner-full-control",
-    )
+    def compute_etag(path: str, part_size: int) -> str:
+        # Mirrors the ETag S3 assigns: plain MD5 for single uploads, MD5 of the part digests for multipart ones
+        part_digests = []
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(part_size), b""):
+                part_digests.append(hashlib.md5(chunk).digest())
+        if len(part_digests) == 0:
+            return hashlib.md5(b"").hexdigest()
+        if os.path.getsize(path) < part_size:
+            return part_digests[0].hex()
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+
+
+    def list_remote_etags(bucket: str, prefix: str) -> dict:
+        etags = {}
+        paginator = s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                etags[item["Key"]] = item["ETag"].strip('"')
+        return etags
+
+
+    def upload(path: str, bucket: str, key: str, title: str, content_type: str, acl: str | None = None) -> dict:
+        extra_args = {"ContentType": content_type}
+        if acl:
+            extra_args["ACL"] = acl
+        s3_client.upload_file(path, bucket, key, ExtraArgs=extra_args, Config=deploy_transfer_config)
+        return s3_client.head_object(Bucket=bucket, Key=key)
+
+
+    uploads = [
+        (f"{folder_tasks_batch_config_path}admin.json", aws_private_bucket, f"{s3_private_generator_path}admin.json", "Admin Credentials", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_hits_config}", aws_private_bucket, f"{s3_private_task_path}{filename_hits_config}", "Hits", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_instructions_evaluation_config}", aws_private_bucket, f"{s3_private_task_path}{filename_instructions_evaluation_config}", "Assessment Instructions", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_instructions_general_config}", aws_private_bucket, f"{s3_private_task_path}{filename_instructions_general_config}", "General Instructions", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_questionnaires_config}", aws_private_bucket, f"{s3_private_task_path}{filename_questionnaires_config}", "Questionnaires", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_dimensions_config}", aws_private_bucket, f"{s3_private_task_path}{filename_dimensions_config}", "Dimensions", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_search_engine_config}", aws_private_bucket, f"{s3_private_task_path}{filename_search_engine_config}", "Search Engine", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_task_settings_config}", aws_private_bucket, f"{s3_private_task_path}{filename_task_settings_config}", "Task Settings", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_task_path}{filename_workers_settings_config}", aws_private_bucket, f"{s3_private_task_path}{filename_workers_settings_config}", "Workers Settings", "application/json", "bucket-owner-full-control"),
+        (f"{folder_tasks_batch_deploy_path}scripts.js", aws_deploy_bucket, f"{s3_deploy_path}scripts.js", "Javascript Assets", "text/javascript", "public-read"),
+        (f"{folder_tasks_batch_deploy_path}styles.css", aws_deploy_bucket, f"{s3_deploy_path}styles.css", "CSS Styles", "text/css", "public-read"),
+        (f"{folder_tasks_batch_deploy_path}index.html", aws_deploy_bucket, f"{s3_deploy_path}index.html", "Task Homepage", "text/html", "public-read"),
+    ]
 
-    console.print("[white on green bold]Task configuration[/white on green bold]")
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_hits_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_hits_config}",
-        "Hits",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_instructions_evaluation_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_instructions_evaluation_config}",
-        "Assessment Instructions",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_instructions_general_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_instructions_general_config}",
-        "General Instructions",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_questionnaires_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_questionnaires_config}",
-        "Questionnaires",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_dimensions_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_dimensions_config}",
-        "Dimensions",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_search_engine_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_search_engine_config}",
-        "Search Engine",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_task_settings_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_task_settings_config}",
-        "Task Settings",
-        "application/json",
-        "bucket-owner-full-control",
-    )
-    upload(
-        f"{folder_tasks_batch_task_path}{filename_workers_settings_config}",
-        aws_private_bucket,
-        f"{s3_private_task_path}{filename_workers_settings_config}",
-        "Workers Settings",
-        "application/json",
-        "bucket-owner-full-control",
-    )
+    deploy_start = time.time()
+
+    # One listing per bucket covers every destination key of this batch
+    status.update("Comparing local files with deployed objects")
+    remote_etags = {}
+    if not deploy_force:
+        for bucket in {aws_private_bucket, aws_deploy_bucket}:
+            remote_etags[bucket] = list_remote_etags(bucket, s3_deploy_path)
+
+    uploads_pending = []
+    bytes_skipped = 0
+    bytes_uploaded = 0
+    for path, bucket, key, title, content_type, acl in uploads:
+        local_etag = compute_etag(path, deploy_multipart_threshold)
+        if remote_etags.get(bucket, {}).get(key) == local_etag:
+            bytes_skipped = bytes_skipped + os.path.getsize(path)
+            console.print(f"{title}: [yellow]unchanged[/yellow], skipping [italic]s3://{bucket}/{key}[/italic]")
+        else:
+            uploads_pending.append((path, bucket, key, title, content_type, acl))
+
+    status.update(f"Uploading {len(uploads_pending)} files")
+    with ThreadPoolExecutor(max_workers=deploy_threads) as executor:
+        futures = {executor.submit(upload, *upload_current): upload_current for upload_current in uploads_pending}
+        for future in as_completed(futures):
+            path, bucket, key, title, content_type, acl = futures[future]
+            response = future.result()
+            bytes_uploaded = bytes_uploaded + os.path.getsize(path)
+            panel = Panel(
+                f"Region: [italic white on black]{aws_region}[/italic white on black]\n"
+                f"Bucket: [italic white on black]{bucket}[/italic white on black]\n"
+                f"File: [italic white on black]{path}[/italic white on black]\n"
+                f"Key: [italic white on black]{key}[/italic white on black]\n"
+                f"Path: [italic white on black]s3://{aws_region}/{bucket}/{key}[/italic white on black]\n"
+                f"ACL: {acl}\n"
+                f"HTTP Status Code: {response['ResponseMetadata']['HTTPStatusCode']}, ETag: {response['ETag']}",
+                title=title,
+            )
+            console.print(panel)
 
-    console.print("[white on purple bold]Angular Application[/white on purple bold]")
-    upload(
-        f"{folder_tasks_batch_deploy_path}scripts.js",
-        aws_deploy_bucket,
-        f"{s3_deploy_path}scripts.js",
-        "Javascript Assets",
-        "text/javascript",
-        "public-read",
-    )
-    upload(
-        f"{folder_tasks_batch_deploy_path}styles.css",
-        aws_deploy_bucket,
-        f"{s3_deploy_path}styles.css",
-        "CSS Styles",
-        "text/css",
-        "public-read",
-    )
-    upload(
-        f"{folder_tasks_batch_deploy_path}index.html",
-        aws_deploy_bucket,
-        f"{s3_deploy_path}index.html",
-        "Task Homepage",
-        "text/html",
-        "public-read",
+    console.print(
+        f"Uploaded [cyan]{len(uploads_pending)}[/cyan] files ({bytes_uploaded} bytes), "
+        f"skipped [cyan]{len(uploads) - len(uploads_pending)}[/cyan] unchanged files ({bytes_skipped} bytes saved) "
+        f"in [cyan]{round(time.time() - deploy_start, 2)}[/cyan] seconds"
     )
 
     if "results_retrieved" in search_engine_config and len(search_engine_config["results_retrieved"]) > 0:
@@ -1,15 +1,25 @@
+import glob
 import json
 import os
 import collections
+import email.utils
 import re
+import sqlite3
+import threading
+import time
 import numpy as np
+import pandas as pd
+import pyarrow as pa
 import datefinder
 import string
 import random
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import lru_cache
 from rich.console import Console
 
 console = Console()
+# The enrichment cache connection is shared by the snapshot threads, which take turns on it
+enrichment_cache_lock = threading.Lock()
 
 
 def serialize_json(folder, filename, data, enc='utf-8'):
@@ -35,6 +45,44 @@ def read_json(p, enc='utf-8'):
         return {}
 
 
+def enrichment_cache_connect(path):
+    # Opened once per run and passed to the other enrichment_cache_* functions
+    conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS enrichment_cache (key TEXT NOT NULL, provider TEXT NOT NULL, data TEXT NOT NULL, time_fetched REAL NOT NULL, PRIMARY KEY (key, provider))")
+    conn.execute("CREATE INDEX IF NOT EXISTS enrichment_cache_time_fetched ON enrichment_cache (time_fetched)")
+    return conn
+
+
+def enrichment_cache_get(conn, key, provider, ttl=None):
+    with enrichment_cache_lock:
+        entry = conn.execute("SELECT data, time_fetched FROM enrichment_cache WHERE key = ? AND provider = ?", (key, provider)).fetchone()
+    if entry is None:
+        return None
+    data, time_fetched = entry
+    if ttl is not None and time.time() - time_fetched > ttl:
+        return None
+    return json.loads(data)
+
+
+def enrichment_cache_set(conn, key, provider, data):
+    # A single transaction: concurrent readers see either the previous entry or the new one
+    with enrichment_cache_lock, conn:
+        conn.execute("INSERT OR REPLACE INTO enrichment_cache (key, provider, data, time_fetched) VALUES (?, ?, ?, ?)", (key, provider, json.dumps(data, ensure_ascii=False, default=str), time.time()))
+
+
+def enrichment_cache_evict(conn, max_entries):
+    # Called once a batch of lookups is stored, the oldest entries beyond the bound are dropped through the time_fetched index
+    if max_entries is None or max_entries <= 0:
+        return 0
+    with enrichment_cache_lock, conn:
+        entries = conn.execute("SELECT COUNT(*) FROM enrichment_cache").fetchone()[0]
+        if entries <= max_entries:
+            return 0
+        conn.execute("DELETE FROM enrichment_cache WHERE rowid IN (SELECT rowid FROM enrichment_cache ORDER BY time_fetched ASC LIMIT ?)", (entries - max_entries,))
+    return entries - max_entries
+
+
 def random_string(length=11):
     letters = string.ascii_uppercase
     return ''.join(random.choice(letters) for i in range(length))
@@ -82,6 +130,46 @@ def camel_to_snake(name):
                       name.replace('-', ' '))).split()).lower()
 
 
+date_pattern_canonical = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2}(\.\d{6})?)?$')
+date_pattern_ctime = re.compile(r'^(Mon|Tue|Wed|Thu|Fri|Sat|Sun) (Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) [ \d]\d \d{2}:\d{2}:\d{2} \d{4}$')
+date_pattern_javascript = re.compile(r'^(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun) ((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) \d{2} \d{4} \d{2}:\d{2}:\d{2}) GMT([+-])(\d{2})(\d{2})(?: \([^()\d]*\))?$')
+
+
+def parse_date_string_fast(date_raw):
+    # Formats of str(datetime), strftime('%c') and JavaScript's Date.toString(), returned exactly as datefinder does
+    try:
+        if date_pattern_canonical.match(date_raw):
+            return str(datetime.fromisoformat(date_raw))
+        if date_pattern_ctime.match(date_raw):
+            return str(datetime.strptime(date_raw, '%a %b %d %H:%M:%S %Y'))
+        match = date_pattern_javascript.match(date_raw)
+        if match:
+            # datefinder reads the offset as a POSIX "GMT+h" zone, whose sign is inverted, and a zero offset as UTC
+            sign = '-' if match.group(2) == '+' and match.group(3) + match.group(4) != '0000' else '+'
+            return f"{datetime.strptime(match.group(1), '%b %d %Y %H:%M:%S')}{sign}{match.group(3)}:{match.group(4)}"
+    except ValueError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=65536)
+def parse_date_string(date_raw):
+    date_current = parse_date_string_fast(date_raw) if type(date_raw) is str else None
+    if date_current is None:
+        dates_found = []
+        date_parsed = datefinder.find_dates(date_raw, strict=True)
+        for date_found in date_parsed:
+            dates_found.append(str(date_found))
+        if len(dates_found) > 1:
+            console.print(f"[yellow] Multiple dates found for {' '.join(dates_found)}")
+        if len(dates_found) > 0:
+            date_current = dates_found[0]
+    if date_current is not None and '+' in date_current:
+        date_parts = date_current.split("+")
+        date_current = ' '.join(date_parts)
+    return date_current
+
+
 def find_date_string(date, seconds=False):
     if type(date) is int or type(date) is float or type(date) is np.float64 or type(date) is np.float32:
         if seconds:
@@ -90,17 +178,14 @@ def find_date_string(date, seconds=False):
             date_raw = str(datetime.fromtimestamp(date // 1000))
     else:
         date_raw = date
-    dates_found = []
-    date_parsed = datefinder.find_dates(date_raw, strict=True)
-    for date_current in date_parsed:
-        dates_found.append(str(date_current))
-    if len(dates_found) > 1:
-        console.print(f"[yellow] Multiple dates found for {' '.join(dates_found)}")
-    for date_current in dates_found:
-        if '+' in date_current:
-            date_parts = date_current.split("+")
-            date_current = ' '.join(date_parts)
-        return date_current
+    return parse_date_string(date_raw)
+
+
+def find_date_series(epochs, unit='ms'):
+    # Vectorized equivalent of find_date_string(datetime.fromtimestamp(epoch, timezone('GMT')).strftime('%c'))
+    timestamps = pd.to_datetime(pd.to_numeric(epochs), unit=unit).dt.round('us').dt.floor('s')
+    dates = pd.Series(np.datetime_as_string(timestamps.to_numpy().astype('datetime64[s]')), index=timestamps.index, dtype=object)
+    return dates.str.replace('T', ' ', regex=False).where(timestamps.notna())
 
 
 def merge_dicts(dicts):
@@ -128,6 +213,117 @@ def merge_dicts(dicts):
     return d
 
 
+def find_units_status(df_acl, task_config_folder, batch_names, filename_hits_config='hits.json'):
+    units_status = {}
+    if 'paid' in df_acl.columns:
+        df_acl_paid = df_acl[df_acl['paid'] == True]
+    else:
+        df_acl_paid = df_acl.iloc[0:0]
+    for batch_name in batch_names:
+        hits = read_json(f"{task_config_folder}{batch_name}/{filename_hits_config}")
+        units_paid = set(df_acl_paid.loc[df_acl_paid['batch_name'] == batch_name, 'unit_id'])
+        units = [hit['unit_id'] for hit in hits]
+        units_status[batch_name] = {
+            'completed': [unit_id for unit_id in units if unit_id in units_paid],
+            'missing': [unit_id for unit_id in units if unit_id not in units_paid]
+        }
+    return units_status
+
+
+def dataframe_extension(dataframe_format):
+    return 'parquet' if dataframe_format == 'parquet' else 'csv'
+
+
+def arrow_type_for(value_types):
+    value_types = value_types - {type(None)}
+    if len(value_types) == 0:
+        return pa.string()
+    if value_types <= {bool, np.bool_}:
+        return pa.bool_()
+    if value_types <= {int, np.int64}:
+        return pa.int64()
+    if value_types <= {int, float, np.int64, np.float64}:
+        return pa.float64()
+    return pa.string()
+
+
+def arrow_normalize(dataframe, schema=None):
+    # Columns mixing value types have no single Arrow type, their values are stored as strings instead
+    dataframe = dataframe.copy()
+    for column in dataframe.columns:
+        if schema is not None:
+            column_type = schema.field(column).type
+        elif dataframe[column].dtype == object:
+            column_type = arrow_type_for(set(dataframe[column].dropna().map(type)))
+        else:
+            continue
+        if column_type == pa.string():
+            values = dataframe[column]
+            dataframe[column] = values.where(values.isna(), values.astype(str)).astype(object)
+        elif column_type == pa.float64():
+            dataframe[column] = dataframe[column].astype(float)
+    return dataframe
+
+
+def save_dataframe(dataframe, path, compression='zstd'):
+    if path.endswith('.parquet'):
+        arrow_normalize(dataframe).to_parquet(path, index=False, compression=compression)
+    else:
+        dataframe.to_csv(path, index=False)
+
+
+def load_dataframe(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def append_dataframe_rows(dataframe, rows):
+    # Rows only keep the columns already in the dataframe
+    dataframe_rows = pd.DataFrame(rows, columns=dataframe.columns)
+    if dataframe.shape[0] == 0:
+        return dataframe_rows
+    return pd.concat([dataframe, dataframe_rows], ignore_index=True)
+
+
+def convert_csv_dataframes(folder, compression='zstd'):
+    converted = []
+    for csv_path in sorted(glob.glob(f"{folder}*.csv")):
+        parquet_path = f"{csv_path[:-len('.csv')]}.parquet"
+        if not os.path.exists(parquet_path):
+            save_dataframe(pd.read_csv(csv_path), parquet_path, compression)
+            converted.append(parquet_path)
+    return converted
+
+
+def parse_retry_after(value):
+    # Retry-After holds either a delay in seconds or an HTTP date
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+
+def url_row_try_value(value):
+    # Tries used to be matched against float columns, where a non-numeric value never compares equal
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    return np.nan
+
+
+def url_row_key_matchable(key):
+    # None and NaN never compare equal inside a boolean mask, so keys holding one must never match an indexed row
+    return not any(value is None or (isinstance(value, float) and value != value) for value in key)
+
+
 def handle_aws_error(error):
     console.rule(f"AWS SDK Error Start", style="red")
     console.print(f"Boto3 Code: [blue]{error['Error']['Code']}")
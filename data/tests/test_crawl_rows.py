@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from data.shared import append_dataframe_rows, load_dataframe, save_dataframe
+
+crawl_columns = ['response_uuid', 'response_url', 'response_error_code', 'response_unchanged']
+
+
+def test_rows_only_keep_the_dataframe_columns():
+    df_crawl = pd.DataFrame(columns=crawl_columns)
+    df_crawl = append_dataframe_rows(df_crawl, [{'response_uuid': 'a', 'response_url': 'http://a', 'response_status_code': 200}])
+    assert list(df_crawl.columns) == crawl_columns
+
+
+@pytest.mark.parametrize('extension', ['csv', 'parquet'])
+def test_response_unchanged_persists(tmp_path, extension):
+    df_crawl = pd.DataFrame(columns=crawl_columns)
+    df_crawl = append_dataframe_rows(df_crawl, [
+        {'response_uuid': 'a', 'response_url': 'http://a', 'response_error_code': None, 'response_unchanged': True},
+    ])
+    df_crawl = append_dataframe_rows(df_crawl, [
+        {'response_uuid': 'b', 'response_url': 'http://b', 'response_error_code': None},
+    ])
+    df_crawl_path = str(tmp_path / f"workers_crawling.{extension}")
+    save_dataframe(df_crawl, df_crawl_path)
+    df_crawl = load_dataframe(df_crawl_path)
+    assert 'response_unchanged' in df_crawl.columns
+    assert df_crawl['response_unchanged'].iloc[0] == True
+    assert pd.isna(df_crawl['response_unchanged'].iloc[1])
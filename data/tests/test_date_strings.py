@@ -0,0 +1,37 @@
+from datetime import datetime
+from pathlib import Path
+
+import datefinder
+
+from data.shared import parse_date_string_fast
+
+# str(datetime), str(date), strftime('%c') and Date.toString() samples with several offsets, plus invalid dates
+date_strings = Path(__file__).with_name('date_strings.txt').read_text(encoding='utf-8').splitlines()
+
+
+def parse_date_string_datefinder(date_raw):
+    return next((str(date_found) for date_found in datefinder.find_dates(date_raw, strict=True)), None)
+
+
+def test_fast_path_matches_datefinder():
+    for date_raw in date_strings:
+        assert parse_date_string_fast(date_raw) == parse_date_string_datefinder(date_raw), date_raw
+
+
+def date_string_supported(date_raw):
+    # str(datetime) with a space separator, strftime('%c') and Date.toString() holding a valid date
+    formats = [(date_raw, '%Y-%m-%d'), (date_raw, '%Y-%m-%d %H:%M:%S'), (date_raw, '%Y-%m-%d %H:%M:%S.%f'),
+               (date_raw, '%a %b %d %H:%M:%S %Y'), (date_raw.split(' GMT')[0], '%a %b %d %Y %H:%M:%S')]
+    for date_part, date_format in formats:
+        try:
+            datetime.strptime(date_part, date_format)
+            return True
+        except ValueError:
+            continue
+    return False
+
+
+def test_fast_path_covers_the_samples():
+    # Only invalid dates and other formats are left to datefinder
+    for date_raw in date_strings:
+        assert (parse_date_string_fast(date_raw) is not None) == date_string_supported(date_raw), date_raw
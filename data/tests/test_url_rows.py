@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from data.shared import url_row_key_matchable, url_row_try_value
+
+
+def test_numeric_tries_match_the_float_columns():
+    assert url_row_try_value(1) == 1.0
+    assert url_row_try_value(np.int64(2)) == 2.0
+    assert url_row_try_value(3.0) == 3.0
+    assert url_row_key_matchable(('WORKER', url_row_try_value(1), url_row_try_value(np.int64(1))))
+    assert ('WORKER', url_row_try_value(1)) == ('WORKER', url_row_try_value(1.0))
+
+
+def test_string_tries_never_match():
+    # The boolean mask compared them to float columns, where a string is never equal
+    df_urls = pd.DataFrame({'try_last': [1.0], 'try_current': [1.0]})
+    assert not (df_urls['try_last'] == '1').any()
+    key = ('WORKER', url_row_try_value('1'), url_row_try_value(1))
+    assert not url_row_key_matchable(key)
+
+
+def test_missing_tries_never_match():
+    assert not url_row_key_matchable(('WORKER', url_row_try_value(None), 1.0))
+    assert not url_row_key_matchable(('WORKER', url_row_try_value(np.nan), 1.0))
+
+
+def test_none_fields_never_match():
+    # A missing snippet, name or url never equalled the stored value in the boolean mask
+    df_urls = pd.DataFrame({'response_snippet': [None]}, dtype=object)
+    assert not (df_urls['response_snippet'] == None).any()
+    key = ('WORKER', url_row_try_value(1), url_row_try_value(1), 0, 0, 0, 'http://a', 'name', None)
+    assert not url_row_key_matchable(key)